@@ -0,0 +1,65 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+
+MANIFEST_NAME = "manifest.json"
+
+
+class BuildManifest:
+    def __init__(self, results_dir: Path):
+        self._results_dir = results_dir
+        self._path = results_dir / MANIFEST_NAME
+        self._files: dict[str, dict[str, int | str]] = {}
+        self._artifacts: dict[str, dict[str, dict | list]] = {}
+        if self._path.exists():
+            with open(self._path) as fd:
+                manifest = json.load(fd)
+            self._files = manifest.get("files", {})
+            self._artifacts = manifest.get("artifacts", {})
+
+    def file_hash(self, path: Path) -> str:
+        # Hashing is skipped for files whose size and mtime match the last recorded hash
+        stat = path.stat()
+        key = str(path)
+        cached = self._files.get(key)
+        if cached is not None and cached["size"] == stat.st_size and cached["mtime_ns"] == stat.st_mtime_ns:
+            return cached["sha256"]
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as fd:
+            for chunk in iter(lambda: fd.read(1 << 20), b""):
+                digest.update(chunk)
+        self._files[key] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest.hexdigest()}
+        return digest.hexdigest()
+
+    def hash_inputs(self, paths: list[Path]) -> dict[str, str]:
+        return {str(path): self.file_hash(path) for path in sorted(paths)}
+
+    def is_stale(self, artifact: str, inputs: dict[str, str], settings: dict[str, bool]) -> bool:
+        entry = self._artifacts.get(artifact)
+        if entry is None or entry["inputs"] != inputs or entry["settings"] != settings:
+            return True
+        return not all((self._results_dir / output).exists() for output in entry["outputs"])
+
+    def record(self, artifact: str, inputs: dict[str, str], settings: dict[str, bool], outputs: list[Path]):
+        self._artifacts[artifact] = {
+            "inputs": inputs,
+            "settings": settings,
+            "outputs": sorted(str(output.relative_to(self._results_dir)) for output in outputs),
+        }
+
+    def clear(self, artifact: str):
+        # Outputs of earlier settings (e.g. another layout) are removed before an artifact is regenerated
+        entry = self._artifacts.pop(artifact, None)
+        if entry is None:
+            return
+        for output in entry["outputs"]:
+            (self._results_dir / output).unlink(missing_ok=True)
+
+    def save(self):
+        tmp = self._path.with_suffix(".tmp")
+        with open(tmp, "w") as fd:
+            json.dump({"files": self._files, "artifacts": self._artifacts}, fd, indent=1)
+        os.replace(tmp, self._path)
@@ -0,0 +1,172 @@
+import dataclasses
+import json
+import os
+import re
+import sqlite3
+from pathlib import Path
+from import_data import _load_config_data
+
+
+CATALOG_PATH = Path("./capture_catalog.sqlite3")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS captures (
+    path TEXT PRIMARY KEY,
+    node INTEGER NOT NULL,
+    run TEXT,
+    distance INTEGER NOT NULL,
+    channel INTEGER,
+    data_rate INTEGER,
+    pulse_rate INTEGER,
+    preamble INTEGER,
+    pac INTEGER,
+    tx_power INTEGER,
+    sample_count INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS captures_selection ON captures (channel, node, distance);
+"""
+
+_COLUMNS = ("path", "node", "run", "distance", "channel", "data_rate", "pulse_rate", "preamble", "pac", "tx_power",
+            "sample_count", "size", "mtime_ns")
+
+
+@dataclasses.dataclass(frozen=True)
+class CaptureRecord:
+    path: Path
+    node: int
+    run: str | None
+    distance: int
+    channel: int | None
+    data_rate: int | None
+    pulse_rate: int | None
+    preamble: int | None
+    pac: int | None
+    tx_power: int | None
+    sample_count: int
+    size: int
+    mtime_ns: int
+
+    @property
+    def configuration(self) -> tuple[int | None, ...]:
+        return self.channel, self.data_rate, self.pulse_rate, self.preamble, self.pac, self.tx_power
+
+
+@dataclasses.dataclass
+class CaptureQuery:
+    # Ranges are inclusive (low, high) pairs, `None` matches everything
+    nodes: tuple[int, int] | None = None
+    distances: tuple[int, int] | None = None
+    runs: list[str] | None = None
+    channel: int | None = None
+    data_rate: int | None = None
+    pulse_rate: int | None = None
+    preamble: int | None = None
+    pac: int | None = None
+    tx_power: int | None = None
+
+    def where(self) -> tuple[str, list[int | str]]:
+        clauses: list[str] = []
+        params: list[int | str] = []
+        for column, bounds in (("node", self.nodes), ("distance", self.distances)):
+            if bounds is not None:
+                clauses += [f"{column} BETWEEN ? AND ?"]
+                params += list(bounds)
+        for column in ("channel", "data_rate", "pulse_rate", "preamble", "pac", "tx_power"):
+            value = getattr(self, column)
+            if value is not None:
+                clauses += [f"{column} = ?"]
+                params += [value]
+        if self.runs is not None:
+            clauses += [f"run IN ({', '.join('?' * len(self.runs))})"]
+            params += self.runs
+        return " AND ".join(clauses) if clauses else "1", params
+
+
+def _extract_distance(name: str, json_data: dict) -> int:
+    if "distance" in json_data:
+        return json_data["distance"]
+    numbers = [int(x) for x in re.findall(r"\d+", name)]
+    if not numbers:
+        raise ValueError("Improperly named file")
+    return numbers[0]
+
+
+def _int_or_none(value) -> int | None:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class CaptureCatalog:
+    def __init__(self, path: Path = CATALOG_PATH, data_dir: Path = Path("./data")):
+        self._data_dir = data_dir
+        self._db = sqlite3.connect(path)
+        self._db.executescript(_SCHEMA)
+
+    def __enter__(self) -> "CaptureCatalog":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._db.close()
+
+    def _scan(self) -> dict[str, tuple[int, str | None, os.stat_result]]:
+        # Layout: data/Node <n>/<distance>.json for a single run or data/Node <n>/<run>/<distance>.json
+        found: dict[str, tuple[int, str | None, os.stat_result]] = {}
+        for node_dir in self._data_dir.iterdir():
+            if not node_dir.is_dir():
+                continue
+            node = int(str(node_dir.stem).split()[-1])
+            for entry in node_dir.iterdir():
+                if entry.is_dir():
+                    for capture in entry.glob("*.json"):
+                        found[str(capture)] = (node, entry.name, capture.stat())
+                elif entry.suffix == ".json":
+                    found[str(entry)] = (node, None, entry.stat())
+        return found
+
+    def refresh(self) -> int:
+        # Only new or modified captures are opened, returns how many were (re)indexed
+        known = {path: (size, mtime_ns) for path, size, mtime_ns in
+                 self._db.execute("SELECT path, size, mtime_ns FROM captures")}
+        found = self._scan()
+
+        rows = []
+        for path, (node, run, stat) in found.items():
+            if known.get(path) == (stat.st_size, stat.st_mtime_ns):
+                continue
+            with open(path) as fd:
+                json_data = json.load(fd)
+            config = _load_config_data(json_data["configurations"])
+            rows += [(path, node, run, int(_extract_distance(Path(path).name, json_data)),
+                      *(_int_or_none(config[key][0]) for key in
+                        ("Channel", "Data rate", "Pulse rate", "Preamble", "PAC", "TX Power")),
+                      sum(len(samples) for samples in json_data["samples"].values()),
+                      stat.st_size, stat.st_mtime_ns)]
+
+        with self._db:
+            self._db.executemany(f"INSERT OR REPLACE INTO captures VALUES ({', '.join('?' * len(_COLUMNS))})", rows)
+            self._db.executemany("DELETE FROM captures WHERE path = ?",
+                                 [(path,) for path in known.keys() - found.keys()])
+        return len(rows)
+
+    def select(self, query: CaptureQuery = CaptureQuery()) -> list[CaptureRecord]:
+        where, params = query.where()
+        cursor = self._db.execute(f"SELECT {', '.join(_COLUMNS)} FROM captures WHERE {where} "
+                                  f"ORDER BY node, run, distance", params)
+        return [CaptureRecord(Path(row[0]), *row[1:]) for row in cursor]
+
+    def nodes(self) -> list[int]:
+        return [node for node, in self._db.execute("SELECT DISTINCT node FROM captures ORDER BY node")]
+
+
+if __name__ == "__main__":
+    with CaptureCatalog() as catalog:
+        print(f"Indexed {catalog.refresh()} captures")
+        for record in catalog.select():
+            print(record)
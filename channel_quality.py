@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+
+# RX power minus first path power (dB) below LOS_THRESHOLD is line of sight, above NLOS_THRESHOLD non line of sight
+LOS_THRESHOLD = 6.0
+NLOS_THRESHOLD = 10.0
+LOS, UNCERTAIN, NLOS = 0, 1, 2
+CHANNEL_CLASSES = ("LOS", "uncertain", "NLOS")
+
+
+def rx_fp_difference(cir, fp_amp1, fp_amp2, fp_amp3) -> np.ndarray:
+    # Same as rx_power_level - first_path_power_level, the preamble count and pulse rate constant cancel out
+    cir = np.asarray(cir, dtype=float)
+    cir = np.where(cir <= 0, 1e-9, cir)
+    fp_amp1 = np.asarray(fp_amp1, dtype=float)
+    fp_amp2 = np.asarray(fp_amp2, dtype=float)
+    fp_amp3 = np.asarray(fp_amp3, dtype=float)
+    return 10 * np.log10((cir * (2 ** 17)) / ((fp_amp1 ** 2) + (fp_amp2 ** 2) + (fp_amp3 ** 2)))
+
+
+def snr(fp_amp2, std_noise) -> np.ndarray:
+    std_noise = np.maximum(np.asarray(std_noise, dtype=float), 1)
+    return 20 * np.log10(np.asarray(fp_amp2, dtype=float) / std_noise)
+
+
+def classify(rx_fp_diff, fp_amp2, max_noise) -> np.ndarray:
+    rx_fp_diff = np.asarray(rx_fp_diff, dtype=float)
+    codes = np.full(len(rx_fp_diff), UNCERTAIN, dtype=np.int8)
+    codes[rx_fp_diff < LOS_THRESHOLD] = LOS
+    codes[rx_fp_diff > NLOS_THRESHOLD] = NLOS
+    # A first path that does not rise above the noise peak cannot be told apart from a late multipath component
+    codes[np.asarray(fp_amp2) <= np.asarray(max_noise)] = UNCERTAIN
+    return codes
+
+
+def channel_quality(samples: pd.DataFrame, rx_fp_diff: np.ndarray | None = None) -> pd.DataFrame:
+    # `rx_fp_diff` can be passed when the RX and first path power levels of the samples are already known
+    if rx_fp_diff is None:
+        rx_fp_diff = rx_fp_difference(samples["MAX_GROWTH_CIR"], samples["FIRST_PATH_AMP1"],
+                                      samples["FIRST_PATH_AMP2"], samples["FIRST_PATH_AMP3"])
+    codes = classify(rx_fp_diff, samples["FIRST_PATH_AMP2"], samples["MAX_NOISE"])
+    return pd.DataFrame({
+        "snr": snr(samples["FIRST_PATH_AMP2"], samples["STD_NOISE"]),
+        "rx_fp_diff": rx_fp_diff,
+        "channel": pd.Categorical.from_codes(codes, CHANNEL_CLASSES),
+    }, index=samples.index)
@@ -1,9 +1,16 @@
 import matplotlib.pyplot as plt
+import numpy as np
 import dataclasses
+import enum
+import html
+import io
+import json
+import math
 from pathlib import Path
 from import_data import UwbData
 from process_data import UwbStats
-import statistics
+from path_loss import PathLoss
+from channel_quality import LOS_THRESHOLD, NLOS_THRESHOLD
 
 
 @dataclasses.dataclass
@@ -16,21 +23,110 @@ class GraphEnable:
     rx_pow: bool = True
     fp_pow: bool = True
     rx_fp_diff: bool = True
+    path_loss: bool = True
+
+
+class PlotLayout(enum.Enum):
+    # One figure per plot kind and distance, as PNGs
+    FIGURES = "figures"
+    # Every enabled panel of a run in a single figure, saved as dashboard.png
+    DASHBOARD = "dashboard"
+    # The dashboard figure as inline SVG plus the plotted data, saved as dashboard.html
+    HTML = "html"
+
+
+def _frozen(array, dtype=float) -> np.ndarray:
+    array = np.array(array, dtype=dtype)
+    array.flags.writeable = False
+    return array
+
+
+@dataclasses.dataclass(frozen=True)
+class PlotSeries:
+    distances: np.ndarray
+    range_mean: np.ndarray
+    range_stddev: np.ndarray
+    range_var: np.ndarray
+    abs_error: np.ndarray
+    rel_error: np.ndarray
+    rssi_mean: np.ndarray
+    rssi_stddev: np.ndarray
+    rssi_var: np.ndarray
+    mean_cir: np.ndarray
+    prr: np.ndarray
+    rx_pow_mean: np.ndarray
+    fp_mean: np.ndarray
+    rx_fp_diff_mean: np.ndarray
+    # Per-sample series, one array per entry of `distances`
+    ranges: tuple[np.ndarray, ...]
+    rssi: tuple[np.ndarray, ...]
+    rx_fp_diff: tuple[np.ndarray, ...]
+
+    # Errors are derived from `ranges` when plotting instead of being stored next to them
+    @property
+    def abs_errors(self) -> tuple[np.ndarray, ...]:
+        return tuple(np.abs(r - d) for r, d in zip(self.ranges, self.distances))
+
+    @property
+    def rel_errors(self) -> tuple[np.ndarray, ...]:
+        return tuple(np.abs(r - d) / d for r, d in zip(self.ranges, self.distances))
+
+    @classmethod
+    def from_stats(cls, stats: UwbStats) -> "PlotSeries":
+        frame = stats.stats.sort_values("range")
+        distances = frame["range"].to_numpy()
+        ranges = tuple(_frozen(stats.data[distance].samples["RANGE"]) for distance in distances)
+        rx_fp_diff = tuple(_frozen(stats.power.rx_fp_difference(distance)) for distance in distances)
+        abs_error = np.abs(frame["range_mean"].to_numpy() - distances)
+        return cls(
+            distances=_frozen(distances, distances.dtype),
+            range_mean=_frozen(frame["range_mean"]),
+            range_stddev=_frozen(frame["range_stddev"]),
+            range_var=_frozen(frame["range_var"]),
+            abs_error=_frozen(abs_error),
+            rel_error=_frozen(abs_error / distances),
+            rssi_mean=_frozen(frame["rssi_mean"]),
+            rssi_stddev=_frozen(frame["rssi_stddev"]),
+            rssi_var=_frozen(frame["rssi_var"]),
+            mean_cir=_frozen(frame["mean_cir"]),
+            prr=_frozen(frame["prr"]),
+            rx_pow_mean=_frozen(frame["rx_pow_mean"]),
+            fp_mean=_frozen(frame["fp_mean"]),
+            rx_fp_diff_mean=_frozen([diff.mean() for diff in rx_fp_diff]),
+            ranges=ranges,
+            rssi=tuple(_frozen(stats.data[distance].samples["RSSI"]) for distance in distances),
+            rx_fp_diff=rx_fp_diff,
+        )
 
 
 class DataRepresentation:
-    def __init__(self, stats: UwbStats, show: bool = True, enable: GraphEnable = GraphEnable(), save_dir: Path | None = None):
-        self._stats = stats
+    def __init__(self, stats: UwbStats | PlotSeries, show: bool = True, enable: GraphEnable = GraphEnable(), save_dir: Path | None = None,
+                 layout: PlotLayout = PlotLayout.FIGURES, path_loss: dict[str, PathLoss] | None = None):
+        self._series = stats if isinstance(stats, PlotSeries) else PlotSeries.from_stats(stats)
         self._enable = enable
         self._show = show
         self._save_dir = save_dir
+        self._layout = layout
+        self._path_loss = path_loss if enable.path_loss else None
+        # Files written by the last `plot` call
+        self._outputs: list[Path] = []
+
+    def _plot_path_loss(self, ax, metric: str, x):
+        if self._path_loss is None:
+            return
+        fit = self._path_loss[metric]
+        ax.plot(x, fit.predict(self._series.distances), color='red', marker='.',
+                label=f"Path loss fit (n={fit.exponent:.2f}, \u03c3={fit.sigma:.2f} dB)")
+        ax.legend()
+
+    @property
+    def series(self) -> PlotSeries:
+        return self._series
 
     def _plot_avg_rssi(self):
         base = -100
-        x = self._stats.distances
-        x.sort()
-        x_labels = [str(i) for i in x]
-        y = [self._stats.stats.loc[distance, 'rssi_mean'] - base for distance in x]
+        x_labels = [str(i) for i in self._series.distances]
+        y = self._series.rssi_mean - base
 
         fig, ax = plt.subplots()
         bars = ax.bar(x_labels, y, align='center', width=1.0, bottom=base)
@@ -40,6 +136,7 @@ class DataRepresentation:
             ax.text(bar.get_x() + bar.get_width() / 2, yval + 0.1, f"{yval:.2f}", ha='center', va='bottom', rotation=45)
 
         ax.set_yticks(range(base, 0, 10))
+        self._plot_path_loss(ax, "rssi", x_labels)
 
         ax.set_xlabel("Distance (m)")
         ax.set_ylabel("RSSI (dBm)")
@@ -48,14 +145,14 @@ class DataRepresentation:
         if self._save_dir is not None:
             fname = self._save_dir / "distance_v_rssi.png"
             fig.savefig(fname)
+            self._outputs += [fname]
 
         if not self._show:
             plt.close(fig)
 
     def _plot_stddev_hist(self):
-        x = sorted(self._stats.distances)
-        x_labels = [str(i) for i in x]
-        y = [self._stats.stats.loc[distance, 'range_stddev'] for distance in x]
+        x_labels = [str(i) for i in self._series.distances]
+        y = self._series.range_stddev
 
         fig, ax = plt.subplots()
         bars = ax.bar(x_labels, y, align='center', width=1.0, )
@@ -75,14 +172,14 @@ class DataRepresentation:
         if self._save_dir is not None:
             fname = self._save_dir / "distance_v_stddev.png"
             fig.savefig(fname)
+            self._outputs += [fname]
 
         if not self._show:
             plt.close(fig)
 
     def _plot_variance_hist(self):
-        x = sorted(self._stats.distances)
-        x_labels = [str(i) for i in x]
-        y = [self._stats.stats.loc[distance, 'range_var'] for distance in x]
+        x_labels = [str(i) for i in self._series.distances]
+        y = self._series.range_var
 
         fig, ax = plt.subplots()
         bars = ax.bar(x_labels, y, align='center', width=1.0, )
@@ -103,6 +200,7 @@ class DataRepresentation:
         if self._save_dir is not None:
             fname = self._save_dir / "distance_v_variance.png"
             fig.savefig(fname)
+            self._outputs += [fname]
 
         if not self._show:
             plt.close(fig)
@@ -120,15 +218,16 @@ class DataRepresentation:
             if self._save_dir is not None:
                 fname = self._save_dir / f"rssi_{distance}m.png"
                 fig.savefig(fname)
+                self._outputs += [fname]
                 plt.close(fig)
 
-        for dist in self._stats.distances:
-            _plot_hist(dist, self._stats.data[dist].samples['RSSI'])
+        for dist, rssi in zip(self._series.distances, self._series.rssi):
+            _plot_hist(dist, rssi)
 
     def _plot_rssi_stats(self):
-        x = sorted(self._stats.distances)
-        y_stddev = [self._stats.stats.loc[distance, 'rssi_stddev'] for distance in x]
-        y_var = [self._stats.stats.loc[distance, 'rssi_var'] for distance in x]
+        x = self._series.distances
+        y_stddev = self._series.rssi_stddev
+        y_var = self._series.rssi_var
 
         fig, ax = plt.subplots(nrows=2)
         ax[0].plot(x, y_stddev)
@@ -149,16 +248,15 @@ class DataRepresentation:
         if self._save_dir is not None:
             fname = self._save_dir / "ble-rssi-stats.png"
             fig.savefig(fname)
+            self._outputs += [fname]
 
         if not self._show:
             plt.close(fig)
 
     def _plot_avg_cir(self):
         base = 0
-        x = self._stats.distances
-        x.sort()
-        x_labels = [str(i) for i in x]
-        y = [self._stats.stats.loc[distance, 'mean_cir'] - base for distance in x]
+        x_labels = [str(i) for i in self._series.distances]
+        y = self._series.mean_cir - base
 
         fig, ax = plt.subplots()
         bars = ax.bar(x_labels, y, align='center', width=1.0, bottom=base)
@@ -174,15 +272,16 @@ class DataRepresentation:
         if self._save_dir is not None:
             fname = self._save_dir / "distance_v_cir.png"
             fig.savefig(fname)
+            self._outputs += [fname]
 
         if not self._show:
             plt.close(fig)
 
     def _plot_distance_absolute_error(self):
-        x = sorted(self._stats.distances)
-        y = [abs(self._stats.stats.loc[distance, 'range_mean'] - distance) for distance in x]
-        stddev_y = [self._stats.stats.loc[distance, 'range_stddev'] for distance in x]
-        var_y = [self._stats.stats.loc[distance, 'range_var'] for distance in x]
+        x = self._series.distances
+        y = self._series.abs_error
+        stddev_y = self._series.range_stddev
+        var_y = self._series.range_var
 
         fig, ax = plt.subplots(nrows=3)
         fig.set_size_inches(8, 8)
@@ -210,15 +309,16 @@ class DataRepresentation:
         if self._save_dir is not None:
             fname = self._save_dir / "distance_v_meas_abs_err.png"
             fig.savefig(fname)
+            self._outputs += [fname]
 
         if not self._show:
             plt.close(fig)
 
     def _plot_distance_relative_error(self):
-        x = sorted(self._stats.distances)
-        y = [(abs(self._stats.stats.loc[distance, 'range_mean'] - distance) / distance) for distance in x]
-        stddev_y = [self._stats.stats.loc[distance, 'range_stddev'] for distance in x]
-        var_y = [self._stats.stats.loc[distance, 'range_var'] for distance in x]
+        x = self._series.distances
+        y = self._series.rel_error
+        stddev_y = self._series.range_stddev
+        var_y = self._series.range_var
 
         fig, ax = plt.subplots(nrows=3)
         fig.set_size_inches(10, 10)
@@ -246,13 +346,14 @@ class DataRepresentation:
         if self._save_dir is not None:
             fname = self._save_dir / "distance_v_meas_rel_err.png"
             fig.savefig(fname)
+            self._outputs += [fname]
 
         if not self._show:
             plt.close(fig)
 
     def _plot_experiment_distance(self):
-        x = sorted(self._stats.distances)
-        y = [self._stats.stats.loc[distance, 'range_mean'] for distance in x]
+        x = self._series.distances
+        y = self._series.range_mean
 
         fig, ax = plt.subplots()
         ax.plot(x, x, label="Actual distance")
@@ -267,6 +368,7 @@ class DataRepresentation:
         if self._save_dir is not None:
             fname = self._save_dir / "distance_v_measured_dist.png"
             fig.savefig(fname)
+            self._outputs += [fname]
 
         if not self._show:
             plt.close(fig)
@@ -284,10 +386,11 @@ class DataRepresentation:
             if self._save_dir is not None:
                 fname = self._save_dir / f"measured_distance_hist_{distance}m.png"
                 fig.savefig(fname)
+                self._outputs += [fname]
                 plt.close(fig)
 
-        for dist in self._stats.distances:
-            _plot_hist(dist, self._stats.data[dist].samples['RANGE'])
+        for dist, ranges in zip(self._series.distances, self._series.ranges):
+            _plot_hist(dist, ranges)
 
     def _plot_absolute_error_hist(self):
         bins = [int(x) / 10.0 for x in range(0, 11)]
@@ -302,11 +405,11 @@ class DataRepresentation:
             if self._save_dir is not None:
                 fname = self._save_dir / f"absolute_err_hist_{distance}m.png"
                 fig.savefig(fname)
+                self._outputs += [fname]
                 plt.close(fig)
 
-        for dist in self._stats.distances:
-            data = [abs(range_ - dist) for range_ in self._stats.data[dist].samples['RANGE']]
-            _plot_hist(dist, data)
+        for dist, errors in zip(self._series.distances, self._series.abs_errors):
+            _plot_hist(dist, errors)
 
     def _plot_relative_error_hist(self):
         bins = [int(x) / 100.0 for x in range(0, 11)]
@@ -321,17 +424,15 @@ class DataRepresentation:
             if self._save_dir is not None:
                 fname = self._save_dir / f"relative_err_hist_{distance}m.png"
                 fig.savefig(fname)
+                self._outputs += [fname]
                 plt.close(fig)
 
-        for dist in self._stats.distances:
-            data = [abs(range_ - dist) / dist for range_ in self._stats.data[dist].samples['RANGE']]
-            _plot_hist(dist, data)
+        for dist, errors in zip(self._series.distances, self._series.rel_errors):
+            _plot_hist(dist, errors)
 
     def _plot_rel_err_v_distance_hist(self):
-        x = sorted(self._stats.distances)
-        x_labels = [str(dist) for dist in x]
-        range_mean = [self._stats.stats.loc[distance, 'range_mean'] for distance in x]
-        y = [abs((mean - distance) / distance) for mean, distance in zip(range_mean, x)]
+        x_labels = [str(dist) for dist in self._series.distances]
+        y = self._series.rel_error
 
         fig, ax = plt.subplots()
         ax.bar(x_labels, y, align='center', width=1.0, bottom=0)
@@ -343,15 +444,14 @@ class DataRepresentation:
         if self._save_dir is not None:
             fname = self._save_dir / "rel_err_hist.png"
             fig.savefig(fname)
+            self._outputs += [fname]
 
         if not self._show:
             plt.close(fig)
 
     def _plot_abs_err_v_distance_hist(self):
-        x = sorted(self._stats.distances)
-        x_labels = [str(dist) for dist in x]
-        range_mean = [self._stats.stats.loc[distance, 'range_mean'] for distance in x]
-        y = [abs(mean - distance) for mean, distance in zip(range_mean, x)]
+        x_labels = [str(dist) for dist in self._series.distances]
+        y = self._series.abs_error
 
         fig, ax = plt.subplots()
         ax.bar(x_labels, y, align='center', width=1.0, bottom=0)
@@ -363,14 +463,15 @@ class DataRepresentation:
         if self._save_dir is not None:
             fname = self._save_dir / "abs_err_hist.png"
             fig.savefig(fname)
+            self._outputs += [fname]
 
         if not self._show:
             plt.close(fig)
 
     def _plot_prr(self):
         base = 0
-        x = sorted(self._stats.distances)
-        y = [self._stats.stats.loc[distance, 'prr'] - base for distance in x]
+        x = self._series.distances
+        y = self._series.prr - base
 
         fig, ax = plt.subplots()
         bars = ax.bar([str(i) for i in x], y, align='center', width=1.0, bottom=base)
@@ -388,13 +489,14 @@ class DataRepresentation:
         if self._save_dir is not None:
             fname = self._save_dir / "distance_v_prr.png"
             fig.savefig(fname)
+            self._outputs += [fname]
 
         if not self._show:
             plt.close(fig)
 
     def _plot_uwb_rx_power_and_first_path_power_difference(self):
-        x = sorted(self._stats.distances)
-        y = [statistics.mean([rx - fp for rx, fp in zip(self._stats.stats.loc[distance, 'rx_pow'], self._stats.stats.loc[distance, 'fp'])]) for distance in x]
+        x = self._series.distances
+        y = self._series.rx_fp_diff_mean
 
         fig, ax = plt.subplots()
         ax.plot(x, y)
@@ -403,13 +505,14 @@ class DataRepresentation:
         ax.set_ylabel("RX_POWER - FP_POWER (dB)")
         ax.set_title("Difference between RX Power and First Path Power at Distance")
         ax.grid(True)
-        ax.hlines(6, x[0], x[-1], label="LOS", colors='green', linestyles='dashed')
-        ax.hlines(10, x[0], x[-1], label="NLOS", colors='red', linestyles='dashed')
+        ax.hlines(LOS_THRESHOLD, x[0], x[-1], label="LOS", colors='green', linestyles='dashed')
+        ax.hlines(NLOS_THRESHOLD, x[0], x[-1], label="NLOS", colors='red', linestyles='dashed')
         ax.legend()
 
         if self._save_dir is not None:
             fname = self._save_dir / "distance_v_rx_pow_fp_diff.png"
             fig.savefig(fname)
+            self._outputs += [fname]
 
         if not self._show:
             plt.close(fig)
@@ -417,11 +520,7 @@ class DataRepresentation:
     def _plot_rx_fp_difference_hist(self):
         bins = list(range(0, 20))
 
-        def _plot_diff_hist(distance, rx_pow, fp_pow):
-            diff = []
-            for rx, fp in zip(rx_pow, fp_pow):
-                diff += [rx - fp]
-
+        def _plot_diff_hist(distance, diff):
             fig, ax = plt.subplots()
             ax.hist(diff, bins)
 
@@ -431,23 +530,23 @@ class DataRepresentation:
             ax.set_title(f"RX Power and First Path Power Differences at {distance} m")
 
             ymin, ymax = ax.get_ylim()
-            ax.vlines(6, ymin, ymax, label="LOS", colors='green', linestyles='dashed')
-            ax.vlines(10, ymin, ymax, label="NLOS", colors='red', linestyles='dashed')
+            ax.vlines(LOS_THRESHOLD, ymin, ymax, label="LOS", colors='green', linestyles='dashed')
+            ax.vlines(NLOS_THRESHOLD, ymin, ymax, label="NLOS", colors='red', linestyles='dashed')
             ax.legend()
 
             if self._save_dir is not None:
                 fname = self._save_dir / f"rx-fp_hist_{distance}m.png"
                 fig.savefig(fname)
+                self._outputs += [fname]
                 plt.close(fig)
 
-        for dist in self._stats.distances:
-            _plot_diff_hist(dist, self._stats.stats.loc[dist, 'rx_pow'], self._stats.stats.loc[dist, 'fp'])
+        for dist, diff in zip(self._series.distances, self._series.rx_fp_diff):
+            _plot_diff_hist(dist, diff)
 
     def _plot_rx_pow(self):
         base = -105
-        x = sorted(self._stats.distances)
-        x_labels = [str(i) for i in x]
-        y = [self._stats.stats.loc[distance, 'rx_pow_mean'] - base for distance in x]
+        x_labels = [str(i) for i in self._series.distances]
+        y = self._series.rx_pow_mean - base
 
         fig, ax = plt.subplots()
         bars = ax.bar(x_labels, y, align='center', width=1.0, bottom=base)
@@ -458,6 +557,7 @@ class DataRepresentation:
                       rotation=45)
 
         ax.set_yticks(range(base, 0, 10))
+        self._plot_path_loss(ax, "rx_pow", x_labels)
 
         ax.set_xlabel("Distance (m)")
         ax.set_ylabel("UWB Received Signal Power (dBm)")
@@ -466,12 +566,154 @@ class DataRepresentation:
         if self._save_dir is not None:
             fname = self._save_dir / "distance_v_uwb_rx_power.png"
             fig.savefig(fname)
+            self._outputs += [fname]
 
         if not self._show:
             plt.close(fig)
 
-    def plot(self):
-        self._stats.stats.set_index('range', inplace=True)
+    def _dashboard_panels(self) -> list[tuple[str, str, np.ndarray, str]]:
+        # (title, y label, y values, style) of every enabled aggregate panel, styles `bar:<metric>` get a path
+        # loss overlay
+        s = self._series
+        panels = []
+        if self._enable.rssi:
+            panels += [("Average RSSI", "RSSI (dBm)", s.rssi_mean, "bar:rssi"),
+                       ("BLE RSSI Standard Deviation", "Standard Deviation", s.rssi_stddev, "line"),
+                       ("BLE RSSI Variance", "Variance", s.rssi_var, "line")]
+        if self._enable.cir:
+            panels += [("UWB Max Growth CIR", "UWB Max Growth CIR", s.mean_cir, "bar")]
+        if self._enable.ranging_err:
+            panels += [("Absolute Ranging Error", "Absolute error (m)", s.abs_error, "line"),
+                       ("Relative Ranging Error", "Relative error", s.rel_error, "line"),
+                       ("Range Standard Deviation", "Standard deviation (m)", s.range_stddev, "line"),
+                       ("Range Variance", "Variance", s.range_var, "line")]
+        if self._enable.distance:
+            panels += [("UWB Measured Distance", "Measured Range (m)", s.range_mean, "distance")]
+        if self._enable.prr:
+            panels += [("UWB Packet Reception Rate", "PRR (%)", s.prr, "bar")]
+        if self._enable.rx_fp_diff:
+            panels += [("RX Power - First Path Power", "RX_POWER - FP_POWER (dB)", s.rx_fp_diff_mean, "los")]
+        if self._enable.rx_pow:
+            panels += [("Average UWB RX Power", "RX Power (dBm)", s.rx_pow_mean, "bar:rx_pow")]
+        if self._enable.fp_pow:
+            panels += [("Average UWB First Path Power", "First Path Power (dBm)", s.fp_mean, "bar:fp")]
+        return panels
+
+    def _dashboard_histograms(self) -> list[tuple[str, list, tuple[np.ndarray, ...]]]:
+        # (x label, bins, per-distance samples) of every enabled histogram kind
+        s = self._series
+        hists = []
+        if self._enable.rssi:
+            hists += [("BLE RSSI", list(range(-100, 10, 10)), s.rssi)]
+        if self._enable.ranging_err:
+            hists += [("Absolute Distance Error (m)", [int(x) / 10.0 for x in range(0, 11)], s.abs_errors),
+                      ("Relative Distance Error", [int(x) / 100.0 for x in range(0, 11)], s.rel_errors)]
+        if self._enable.distance:
+            hists += [("Measured Distances (m)", list(range(0, 110, 10)), s.ranges)]
+        if self._enable.rx_fp_diff:
+            hists += [("RX_POWER - FP_POWER (dB)", list(range(0, 20)), s.rx_fp_diff)]
+        return hists
+
+    def _plot_dashboard(self) -> plt.Figure | None:
+        x = self._series.distances
+        panels = self._dashboard_panels()
+        hists = self._dashboard_histograms()
+        if not panels and not hists:
+            # Nothing enabled, like the figures layout no file is written
+            return None
+        columns = 3
+        panel_rows = -(-len(panels) // columns)
+
+        # Fixed spacing instead of constrained layout, which would measure every tick label of every panel
+        fig = plt.figure(figsize=(max(12, 1.6 * len(x)), 3 * panel_rows + 2 * len(hists)))
+        top, bottom = fig.subfigures(2, 1, height_ratios=[3 * max(panel_rows, 1), 2 * max(len(hists), 1)])
+        top.subplots_adjust(left=0.06, right=0.98, top=0.95, bottom=0.08, hspace=0.6, wspace=0.35)
+        bottom.subplots_adjust(left=0.06, right=0.98, top=0.92, bottom=0.08, hspace=0.5, wspace=0.1)
+
+        if panels:
+            axes = top.subplots(panel_rows, columns, squeeze=False).flatten()
+            for ax, (title, ylabel, y, style) in zip(axes, panels):
+                if style.startswith("bar"):
+                    ax.bar([str(i) for i in x], y, align='center', width=0.8)
+                    if style.startswith("bar:"):
+                        self._plot_path_loss(ax, style[len("bar:"):], [str(i) for i in x])
+                else:
+                    ax.plot(x, y, marker='o')
+                    ax.grid(True)
+                if style == "distance":
+                    ax.plot(x, x, label="Actual distance", linestyle='dashed')
+                    ax.legend()
+                elif style == "los":
+                    ax.hlines(LOS_THRESHOLD, x[0], x[-1], label="LOS", colors='green', linestyles='dashed')
+                    ax.hlines(NLOS_THRESHOLD, x[0], x[-1], label="NLOS", colors='red', linestyles='dashed')
+                    ax.legend()
+                ax.set_title(title)
+                ax.set_xlabel("Distance (m)")
+                ax.set_ylabel(ylabel)
+            for ax in axes[len(panels):]:
+                ax.set_visible(False)
+
+        if hists:
+            # Small multiples: one row per kind, one column per distance, shared axes within a row
+            axes = bottom.subplots(len(hists), len(x), squeeze=False, sharex='row', sharey='row')
+            for row, (xlabel, bins, samples) in zip(axes, hists):
+                for ax, distance, values in zip(row, x, samples):
+                    # One stairs artist per histogram is far cheaper to lay out and encode than a patch per bin
+                    counts, edges = np.histogram(values, bins)
+                    ax.stairs(counts, edges, fill=True)
+                    ax.set_title(f"{distance}m", fontsize='small')
+                    ax.tick_params(labelsize='x-small')
+                row[0].set_ylabel(xlabel, fontsize='small')
+
+        return fig
+
+    def _dashboard_data(self) -> dict[str, list[float]]:
+        fields = [field.name for field in dataclasses.fields(PlotSeries)
+                  if isinstance(getattr(self._series, field.name), np.ndarray)]
+        # NaN (e.g. the deviation of a single sample) and infinities are not valid JSON, they are written as null
+        return {field: [value if math.isfinite(value) else None
+                        for value in getattr(self._series, field).tolist()] for field in fields}
+
+    def _write_html_report(self, fig: plt.Figure, fname: Path):
+        svg = io.StringIO()
+        fig.savefig(svg, format="svg")
+        svg = svg.getvalue()
+        svg = svg[svg.index("<svg"):]
+
+        data = self._dashboard_data()
+        header = "".join(f"<th>{html.escape(key)}</th>" for key in data)
+        rows = "".join("<tr>" + "".join("<td></td>" if value is None else f"<td>{value:.4g}</td>" for value in row)
+                       + "</tr>"
+                       for row in zip(*data.values()))
+        title = html.escape(f"Beluga statistics: {fname.parent.name}")
+        with open(fname, "w") as fd:
+            fd.write(f"<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\">\n<title>{title}</title>\n"
+                     f"<style>table {{border-collapse: collapse;}} td, th {{border: 1px solid #ccc; "
+                     f"padding: 2px 6px; text-align: right;}}</style>\n</head>\n<body>\n<h1>{title}</h1>\n"
+                     f"{svg}\n<table>\n<tr>{header}</tr>\n{rows}\n</table>\n"
+                     f"<script type=\"application/json\" id=\"data\">{json.dumps(data, allow_nan=False)}</script>\n"
+                     f"</body>\n</html>\n")
+
+    def plot(self) -> list[Path]:
+        self._outputs = []
+        if self._layout is not PlotLayout.FIGURES:
+            fig = self._plot_dashboard()
+            if fig is None:
+                return self._outputs
+            if self._save_dir is not None:
+                if self._layout is PlotLayout.HTML:
+                    fname = self._save_dir / "dashboard.html"
+                    self._write_html_report(fig, fname)
+                else:
+                    fname = self._save_dir / "dashboard.png"
+                    fig.savefig(fname)
+                self._outputs += [fname]
+            if self._show:
+                plt.show()
+            else:
+                plt.close(fig)
+            return self._outputs
+
         if self._enable.rssi:
             self._plot_avg_rssi()
             self._plot_rssi_hist()
@@ -506,6 +748,7 @@ class DataRepresentation:
 
         if self._show:
             plt.show()
+        return self._outputs
 
 
 if __name__ == "__main__":
@@ -1,8 +1,15 @@
 import json
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
 
+DIAGNOSTICS = ('MAX_NOISE', 'FIRST_PATH_AMP1', 'STD_NOISE', 'FIRST_PATH_AMP2', 'FIRST_PATH_AMP3', 'MAX_GROWTH_CIR',
+               'RX_PREAMBLE_CNT', 'FIRST_PATH')
+# Bit i of the packed `EVENTS` column is set when EVENT_FLAGS[i] is set for the sample
+EVENT_FLAGS = ('PHE', 'RSL', 'CRCG', 'CRCB', 'ARFE', 'OVER', 'SFDTO', 'PTO', 'RTO', 'TXF', 'HPW', 'TXW')
+
+
 def _load_config_data(json_data: dict[str, str | int | bool]) -> pd.DataFrame:
     def _extract_number(s: str, base = 10) -> int | None:
         if base == 10:
@@ -70,14 +77,56 @@ def _load_range_data(json_data: dict[str, list[dict[str, int | float | dict[str,
     return pd.DataFrame(df_dict)
 
 
+def _compact_range_data(samples: pd.DataFrame) -> pd.DataFrame:
+    events = np.zeros(len(samples), dtype=np.uint16)
+    for bit, flag in enumerate(EVENT_FLAGS):
+        events |= (samples[flag].to_numpy() != 0).astype(np.uint16) << bit
+    samples = samples.drop(columns=list(EVENT_FLAGS))
+    samples["EVENTS"] = events
+    samples["ID"] = samples["ID"].astype("category")
+    for key in ("RSSI",) + DIAGNOSTICS:
+        samples[key] = pd.to_numeric(samples[key], downcast="integer")
+    return samples
+
+
+@pd.api.extensions.register_series_accessor("events")
+class EventFlags:
+    def __init__(self, series: pd.Series):
+        if series.dtype != np.uint16:
+            raise AttributeError("Only packed `EVENTS` columns have event flags")
+        self._series = series
+
+    def flag(self, name: str) -> pd.Series:
+        bit = np.uint16(1 << EVENT_FLAGS.index(name))
+        return pd.Series((self._series.to_numpy() & bit) != 0, index=self._series.index, name=name)
+
+    def any(self, *names: str) -> pd.Series:
+        mask = np.uint16(sum(1 << EVENT_FLAGS.index(name) for name in names))
+        return pd.Series((self._series.to_numpy() & mask) != 0, index=self._series.index)
+
+    def count(self, name: str) -> int:
+        return int(self.flag(name).sum())
+
+    def unpack(self) -> pd.DataFrame:
+        return pd.DataFrame({name: self.flag(name) for name in EVENT_FLAGS})
+
+
 class UwbData:
-    def __init__(self, fname: str):
+    def __init__(self, fname: str, compact: bool = False):
         with open(fname, 'r') as fd:
             data = json.load(fd)
 
         self._df0 = _load_config_data(data["configurations"])
         self._df1 = _load_drop_data(data['drops'])
         self._df2 = _load_range_data(data['samples'])
+        if compact:
+            # Event flags are stored as set/unset bits, so non-zero event values all read back as set
+            self._df2 = _compact_range_data(self._df2)
+
+    def event(self, name: str) -> pd.Series:
+        if "EVENTS" in self._df2:
+            return self._df2["EVENTS"].events.flag(name)
+        return self._df2[name] != 0
 
     @property
     def configs(self) -> pd.DataFrame:
@@ -91,6 +140,10 @@ class UwbData:
     def samples(self) -> pd.DataFrame:
         return self._df2
 
+    @property
+    def nbytes(self) -> int:
+        return int(sum(df.memory_usage(deep=True).sum() for df in (self._df0, self._df1, self._df2)))
+
 
 if __name__ == "__main__":
     data = UwbData("test.json")
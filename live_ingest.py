@@ -0,0 +1,256 @@
+import asyncio
+import dataclasses
+import json
+import os
+import sys
+import tty
+import numpy as np
+from process_data import pulse_rate_constant, rx_power_level, first_path_power_level, packet_reception_rate, \
+    fused_stats
+from summary import Moments
+
+
+# Beluga prints one JSON object per line. Ranging records carry the same fields as a capture sample plus the
+# neighbor ID, drop records carry the same fields as a row of `UwbData.drops`. Anything else (banners, AT command
+# responses) is ignored.
+RING_FIELDS: dict[str, np.dtype] = {
+    "RANGE": np.dtype(np.float64),
+    "RSSI": np.dtype(np.int16),
+    "MAX_GROWTH_CIR": np.dtype(np.int32),
+    "RX_PREAMBLE_CNT": np.dtype(np.int32),
+    "FIRST_PATH_AMP1": np.dtype(np.int32),
+    "FIRST_PATH_AMP2": np.dtype(np.int32),
+    "FIRST_PATH_AMP3": np.dtype(np.int32),
+    "RX_POW": np.dtype(np.float64),
+    "FP_POW": np.dtype(np.float64),
+}
+
+
+class RingBuffer:
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError(f"Invalid capacity: {capacity}")
+        self._capacity = capacity
+        self._arrays = {key: np.zeros(capacity, dtype=dtype) for key, dtype in RING_FIELDS.items()}
+        self._head = 0
+        self._size = 0
+
+    def extend(self, columns: dict[str, np.ndarray]):
+        count = len(columns["RANGE"])
+        if count == 0:
+            return
+        # Only the newest `capacity` records can survive the write
+        skip = max(0, count - self._capacity)
+        count -= skip
+        first = min(count, self._capacity - self._head)
+        for key, array in self._arrays.items():
+            values = columns[key][skip:]
+            array[self._head:self._head + first] = values[:first]
+            array[:count - first] = values[first:]
+        self._head = (self._head + count) % self._capacity
+        self._size = min(self._size + count, self._capacity)
+
+    def window(self, key: str) -> np.ndarray:
+        array = self._arrays[key]
+        if self._size < self._capacity:
+            return array[:self._size].copy()
+        return np.concatenate((array[self._head:], array[:self._head]))
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+
+# Diagnostics of a ranging record kept in the ring buffer
+_DIAGNOSTIC_FIELDS = ("MAX_GROWTH_CIR", "RX_PREAMBLE_CNT", "FIRST_PATH_AMP1", "FIRST_PATH_AMP2", "FIRST_PATH_AMP3")
+# Ring buffer fields with running moments, in `fused_stats` block order
+_MOMENT_FIELDS = ("RANGE", "RSSI", "RX_POW", "FP_POW", "MAX_GROWTH_CIR")
+
+
+def _field(value, dtype: np.dtype) -> int | float:
+    # Checked against the ring buffer dtype while the record is parsed, so an out of range value is a parse error
+    if dtype.kind == "f":
+        return float(value)
+    value = int(value)
+    if not np.iinfo(dtype).min <= value <= np.iinfo(dtype).max:
+        raise ValueError(f"Value out of range for {dtype}: {value}")
+    return value
+
+
+class LiveNodeStats:
+    def __init__(self, capacity: int):
+        self._buffer = RingBuffer(capacity)
+        self._moments = {key: Moments() for key in _MOMENT_FIELDS}
+        self._failed_responses = 0
+        self._failed_reports = 0
+
+    def add_samples(self, columns: dict[str, np.ndarray]):
+        self._buffer.extend(columns)
+        count = len(columns["RANGE"])
+        if count == 0:
+            return
+        batch = fused_stats(np.stack([columns[key] for key in _MOMENT_FIELDS]), median=False)
+        for i, key in enumerate(_MOMENT_FIELDS):
+            self._moments[key] = self._moments[key].merge(
+                Moments(count, float(batch["mean"][i]), float(batch["m2"][i])))
+
+    def add_drop(self, stage: int, count: int):
+        match stage:
+            case 1:
+                self._failed_responses += count
+            case 3:
+                self._failed_reports += count
+
+    def snapshot(self) -> dict[str, float | int]:
+        # Means, deviations and PRR cover the whole stream, medians cover the ring buffer window. Without samples
+        # every statistic is NaN.
+        stats: dict[str, float | int] = {}
+        window = fused_stats(np.stack([self._buffer.window(key) for key in _MOMENT_FIELDS[:4]]))
+        for i, (name, key) in enumerate((("range", "RANGE"), ("rssi", "RSSI"), ("rx_pow", "RX_POW"),
+                                         ("fp", "FP_POW"))):
+            moments = self._moments[key]
+            stats[f"{name}_mean"] = moments.mean if moments.count else float("nan")
+            stats[f"{name}_median"] = float(window["median"][i])
+            stats[f"{name}_stddev"] = moments.stddev
+            stats[f"{name}_var"] = moments.var
+        count = self._moments["RANGE"].count
+        if count or self._failed_reports or self._failed_responses:
+            prr, dropped, total = packet_reception_rate(count, self._failed_responses, self._failed_reports)
+        else:
+            prr, dropped, total = float("nan"), 0, 0
+        stats["prr"] = prr
+        stats["dropped_rx"] = dropped
+        stats["total_rx"] = total
+        stats["mean_cir"] = self._moments["MAX_GROWTH_CIR"].mean if count else float("nan")
+        return stats
+
+    @property
+    def buffer(self) -> RingBuffer:
+        return self._buffer
+
+
+@dataclasses.dataclass(frozen=True)
+class RangingBatch:
+    node: int
+    columns: dict[str, np.ndarray]
+
+
+class BelugaStreamIngest:
+    def __init__(self, reader: asyncio.StreamReader, capacity: int = 1 << 16, pulse_rate: int = 64,
+                 queue_depth: int | None = 64, chunk_size: int = 1 << 16):
+        self._reader = reader
+        self._capacity = capacity
+        self._a = pulse_rate_constant(pulse_rate)
+        self._chunk_size = chunk_size
+        self._nodes: dict[int, LiveNodeStats] = {}
+        # Consumers drain this queue. When it is full the ingest loop stops reading, which leaves the
+        # remaining records in the OS buffers of the serial line/socket instead of discarding them.
+        self._queue: asyncio.Queue[RangingBatch | None] | None = \
+            asyncio.Queue(maxsize=queue_depth) if queue_depth is not None else None
+        self._parse_errors = 0
+
+    async def run(self):
+        pending = b""
+        try:
+            while True:
+                chunk = await self._reader.read(self._chunk_size)
+                if not chunk:
+                    break
+                lines = (pending + chunk).split(b"\n")
+                pending = lines.pop()
+                await self._ingest_lines(lines)
+            if pending.strip():
+                await self._ingest_lines([pending])
+        finally:
+            if self._queue is not None:
+                await self._queue.put(None)
+
+    async def batches(self):
+        if self._queue is None:
+            raise ValueError("Ingest was created without a consumer queue")
+        while True:
+            batch = await self._queue.get()
+            if batch is None:
+                return
+            yield batch
+
+    async def _ingest_lines(self, lines: list[bytes]):
+        samples: dict[int, list[tuple]] = {}
+        for line in lines:
+            line = line.strip()
+            if not line.startswith(b"{"):
+                continue
+            try:
+                record = json.loads(line)
+                node = int(record["ID"])
+                if "Stage" in record:
+                    self._node(node).add_drop(int(record["Stage"]), int(record["Count"]))
+                else:
+                    # Every field is pulled out here so a malformed record is counted instead of ending the ingest
+                    diagnostics = record["UWB_DIAGNOSTICS"]
+                    samples.setdefault(node, []).append(
+                        (_field(record["RANGE"], RING_FIELDS["RANGE"]), _field(record["RSSI"], RING_FIELDS["RSSI"]),
+                         *(_field(diagnostics[key], RING_FIELDS[key]) for key in _DIAGNOSTIC_FIELDS)))
+            except (ValueError, KeyError, TypeError):
+                self._parse_errors += 1
+
+        for node, records in samples.items():
+            columns = self._to_columns(records)
+            self._node(node).add_samples(columns)
+            if self._queue is not None:
+                await self._queue.put(RangingBatch(node, columns))
+
+    def _to_columns(self, records: list[tuple]) -> dict[str, np.ndarray]:
+        columns = {key: np.array(values, dtype=RING_FIELDS[key])
+                   for key, values in zip(("RANGE", "RSSI") + _DIAGNOSTIC_FIELDS, zip(*records))}
+        columns["RX_POW"] = rx_power_level(columns["MAX_GROWTH_CIR"], columns["RX_PREAMBLE_CNT"], self._a)
+        columns["FP_POW"] = first_path_power_level(columns["FIRST_PATH_AMP1"], columns["FIRST_PATH_AMP2"],
+                                                   columns["FIRST_PATH_AMP3"], columns["RX_PREAMBLE_CNT"], self._a)
+        return columns
+
+    def _node(self, node: int) -> LiveNodeStats:
+        if node not in self._nodes:
+            self._nodes[node] = LiveNodeStats(self._capacity)
+        return self._nodes[node]
+
+    @property
+    def nodes(self) -> dict[int, LiveNodeStats]:
+        return self._nodes
+
+    @property
+    def parse_errors(self) -> int:
+        return self._parse_errors
+
+
+async def open_beluga_stream(port: str, limit: int = 1 << 20) -> asyncio.StreamReader:
+    # `port` is either a serial device/pty path or `tcp://host:port` for a socket stand-in
+    if port.startswith("tcp://"):
+        host, _, tcp_port = port[len("tcp://"):].rpartition(":")
+        reader, _ = await asyncio.open_connection(host, int(tcp_port), limit=limit)
+        return reader
+
+    fd = os.open(port, os.O_RDONLY | os.O_NOCTTY | os.O_NONBLOCK)
+    if os.isatty(fd):
+        tty.setraw(fd)
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=limit)
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), os.fdopen(fd, "rb", buffering=0))
+    return reader
+
+
+async def _print_live_stats(port: str):
+    ingest = BelugaStreamIngest(await open_beluga_stream(port), queue_depth=None)
+    task = asyncio.create_task(ingest.run())
+    while not task.done():
+        await asyncio.sleep(1)
+        for node, stats in ingest.nodes.items():
+            print(f"Node {node}: {stats.snapshot()}")
+    # Re-raises an error that ended the ingest
+    await task
+
+
+if __name__ == "__main__":
+    asyncio.run(_print_live_stats(sys.argv[1]))
@@ -1,10 +1,16 @@
-import json
+import argparse
+import dataclasses
 from collections.abc import Callable
 from import_data import UwbData
-from process_data import UwbStats
-from data_representation import GraphEnable, DataRepresentation
+from process_data import UwbStats, ConfigurationStats
+from data_representation import GraphEnable, DataRepresentation, PlotLayout
+from build_manifest import BuildManifest
+from path_loss import PathLoss, fit_runs, fit_stats, path_loss_inputs
+from raw_cache import RawDataCache
+from pipeline import RunJob, StageConcurrency, run_pipeline
+from summary import RunSummary
+from capture_catalog import CaptureCatalog, CaptureQuery, CaptureRecord
 from pathlib import Path
-import re
 
 
 SHOW_PLOTS = False
@@ -16,63 +22,56 @@ ENABLE = GraphEnable(
     rssi=True,
     rx_pow=True,
     fp_pow=True,
-    rx_fp_diff=True
+    rx_fp_diff=True,
+    path_loss=True
 )
+LAYOUT = PlotLayout.FIGURES
+COMPACT = False
+# Bytes of per-sample data (raw frames and power series) kept in memory, `None` keeps all of it
+MEMORY_BUDGET: int | None = None
 
 
 class BelugaDataProcessing:
-    def __init__(self, node: int, show: bool = False, enable: GraphEnable = GraphEnable(), save_dir: Path | None = None):
-        self._folder: Path = Path(f"data/Node {node}")
-
-        def individual_run(folder: Path) -> UwbStats:
-            data: dict[int, UwbData] = {}
-            for f in folder.glob("*.json"):
-                distance = self._extract_distance(f.name, f.absolute())
-                data[distance] = UwbData(str(f))
-            return UwbStats(data)
-
-        def multiple_folders() -> dict[str, UwbStats]:
-            data: dict[str, UwbStats] = {}
-            for folder in self._folder.iterdir():
-                if folder.is_dir():
-                    data[str(folder.name)] = individual_run(folder)
-            return data
-
-        if list(self._folder.glob("*.json")):
-            self._stats: UwbStats | dict[str, UwbStats] = individual_run(self._folder)
-            self._graphs = DataRepresentation(self._stats, show, enable, save_dir)
-            self._dirs = None
+    def __init__(self, node: int, show: bool = False, enable: GraphEnable = GraphEnable(), save_dir: Path | None = None,
+                 runs: list[str] | None = None, layout: PlotLayout = PlotLayout.FIGURES,
+                 captures: list[CaptureRecord] | None = None, compact: bool = False,
+                 raw_cache: RawDataCache | None = None):
+        if captures is None:
+            with CaptureCatalog() as catalog:
+                catalog.refresh()
+                captures = catalog.select(CaptureQuery(nodes=(node, node), runs=runs))
+
+        def run_stats(run_captures: list[CaptureRecord]) -> UwbStats:
+            # Distances come from the catalog, so captures are only opened to load their samples
+            stats = UwbStats({capture.distance: UwbData(str(capture.path), compact) for capture in run_captures})
+            if raw_cache is not None:
+                # Statistics are done and plot series are only built when plotting, so the per-sample data may be
+                # evicted before the next run is loaded
+                raw_cache.add(stats)
+                raw_cache.release(stats)
+            return stats
+
+        node_runs: dict[str | None, list[CaptureRecord]] = {}
+        for capture in captures:
+            if runs is None or capture.run in runs:
+                node_runs.setdefault(capture.run, []).append(capture)
+        if None in node_runs:
+            stats = run_stats(node_runs[None])
         else:
-            self._stats: UwbStats | dict[str, UwbStats] = multiple_folders()
-            self._dirs = list(self._stats.keys())
-            if save_dir is None:
-                self._graphs = {key: DataRepresentation(value, show, enable, save_dir) for key, value in self._stats.items()}
-            else:
-                self._graphs = {}
-                for key, value in self._stats.items():
-                    _save_dir = save_dir / key
-                    _save_dir.mkdir(exist_ok=True)
-                    self._graphs[key] = DataRepresentation(value, show, enable, _save_dir)
-
-
-    @staticmethod
-    def _extract_distance(name, absolute_path) -> int:
-        def extract_from_file():
-            with open(absolute_path) as f:
-                data = json.load(f)
-            return data['distance']
-
-        def extract_from_file_name():
-            regex = re.compile(f'\d+')
-            numbers = [int(x) for x in regex.findall(name)]
-            if not numbers:
-                raise ValueError("Improperly named file")
-            return numbers[0]
-
-        try:
-            return extract_from_file()
-        except KeyError:
-            return extract_from_file_name()
+            stats = {run: run_stats(run_captures) for run, run_captures in node_runs.items()}
+
+        self._stats: UwbStats | dict[str, UwbStats] = stats
+        self._dirs = None if isinstance(stats, UwbStats) else list(stats.keys())
+        self._show = show
+        self._enable = enable
+        self._layout = layout
+        self._save_dirs: dict[str | None, Path | None] = {None: save_dir}
+        if self._dirs is not None and save_dir is not None:
+            for key in self._dirs:
+                self._save_dirs[key] = save_dir / key
+                self._save_dirs[key].mkdir(exist_ok=True)
+        # Fitted for all runs of the node on the first plot, unless the models are passed to `plot`
+        self._path_loss: dict[str | None, dict[str, PathLoss]] | None = None
 
     def log_ranging(self, callback: Callable[[any], None] = print, run: str | None = None):
         if isinstance(self._stats, UwbStats):
@@ -106,22 +105,64 @@ class BelugaDataProcessing:
         else:
             raise ValueError("`run` must not be `None`")
 
-    def plot(self):
-        if isinstance(self._graphs, DataRepresentation):
-            self._graphs.plot()
+    def log_channel_quality(self, callback: Callable[[any], None] = print, run: str | None = None):
+        if isinstance(self._stats, UwbStats):
+            self._stats.log_channel_quality(callback)
+        elif run is not None:
+            self._stats[run].log_channel_quality(callback)
         else:
-            for graph in self._graphs.values():
-                graph.plot()
+            raise ValueError("`run` must not be `None`")
+
+    def _graph(self, run: str | None, path_loss: dict[str, PathLoss] | None) -> DataRepresentation:
+        if path_loss is None and self._enable.path_loss:
+            if self._path_loss is None:
+                keys = [None] if self._dirs is None else self._dirs
+                runs_stats = [self._stats] if self._dirs is None else list(self._stats.values())
+                self._path_loss = dict(zip(keys, fit_stats(runs_stats)))
+            path_loss = self._path_loss[run]
+        stats = self._stats if run is None else self._stats[run]
+        return DataRepresentation(stats, self._show, self._enable, self._save_dirs.get(run), self._layout, path_loss)
+
+    def plot(self, run: str | None = None, path_loss: dict[str, PathLoss] | None = None) -> list[Path]:
+        # Returns the files that were written. Graphs are built per call, so their per-sample series do not
+        # outlive the plot.
+        if self._dirs is None:
+            return self._graph(None, path_loss).plot()
+        elif run is not None:
+            return self._graph(run, path_loss).plot()
+        return [output for key in self._dirs for output in self._graph(key, path_loss).plot()]
+
+    def run_stats(self, run: str | None = None) -> UwbStats:
+        if isinstance(self._stats, UwbStats):
+            return self._stats
+        elif run is not None:
+            return self._stats[run]
+        else:
+            raise ValueError("`run` must not be `None`")
+
+    def summary(self, run: str | None = None) -> RunSummary:
+        # Without `run` the summaries of all runs are pooled
+        if isinstance(self._stats, UwbStats):
+            return RunSummary.from_stats(self._stats)
+        elif run is not None:
+            return RunSummary.from_stats(self._stats[run])
+        summaries = [RunSummary.from_stats(stats) for stats in self._stats.values()]
+        pooled = summaries[0]
+        for summary in summaries[1:]:
+            pooled = pooled.merge(summary)
+        return pooled
 
     @property
     def dir_names(self) -> list[str] | None:
         return self._dirs
 
 
-def collect_data_naming() -> list[int]:
-    data_dir = Path("./data")
-    ret: list[int] = [int(str(x.stem).split()[-1]) for x in data_dir.iterdir()]
-    return ret
+def collect_runs(captures: list[CaptureRecord]) -> dict[int, dict[str | None, list[CaptureRecord]]]:
+    # A node folder either holds the captures of a single run (key `None`) or one folder per run
+    nodes: dict[int, dict[str | None, list[CaptureRecord]]] = {}
+    for capture in captures:
+        nodes.setdefault(capture.node, {}).setdefault(capture.run, []).append(capture)
+    return {node: {None: runs[None]} if None in runs else runs for node, runs in sorted(nodes.items())}
 
 def create_dir(node: int) -> Path:
     dir_name = f"Node {node}"
@@ -129,36 +170,109 @@ def create_dir(node: int) -> Path:
     dir_.mkdir(exist_ok=True)
     return dir_
 
-def main(show_plots: bool = False, enable: GraphEnable = GraphEnable()):
-    nodes = collect_data_naming()
+def plan_runs(nodes: dict[int, dict[str | None, list[CaptureRecord]]], manifest: BuildManifest, results: Path,
+              plot_settings: dict[str, bool | str], force: bool = False, show_plots: bool = False) -> list[RunJob]:
+    # Artifacts are the logs and the figures of each run, keyed by the run's output folder
+    jobs: list[RunJob] = []
+    for node, node_runs in nodes.items():
+        dir_ = create_dir(node)
+        for run, captures in node_runs.items():
+            save_dir = dir_ if run is None else dir_ / run
+            artifact = str(save_dir.relative_to(results))
+            inputs = manifest.hash_inputs([capture.path for capture in captures])
+            logs_stale = force or manifest.is_stale(f"{artifact}/logs", inputs, {"logs": list(UwbStats.LOGS)})
+            plots_stale = force or show_plots or manifest.is_stale(f"{artifact}/plots", inputs, plot_settings)
+            if logs_stale or plots_stale:
+                save_dir.mkdir(exist_ok=True)
+                jobs += [RunJob(node, run, captures, save_dir, artifact, inputs, logs_stale, plots_stale)]
+    return jobs
 
-    Path("./results").mkdir(exist_ok=True)
+def main(show_plots: bool = False, enable: GraphEnable = GraphEnable(), force: bool = False,
+         layout: PlotLayout = PlotLayout.FIGURES, query: CaptureQuery = CaptureQuery(), compact: bool = False,
+         by_config: bool = False, pipeline: StageConcurrency | None = None, memory_budget: int | None = None):
+    if pipeline is not None and show_plots:
+        raise ValueError("Plots cannot be shown in pipelined mode")
+    if pipeline is not None and memory_budget is not None:
+        raise ValueError("A memory budget cannot be used in pipelined mode")
+    with CaptureCatalog() as catalog:
+        catalog.refresh()
+        selected = catalog.select(query)
+    nodes = collect_runs(selected)
 
-    for node in nodes:
-        dir_ = create_dir(node)
-        data = BelugaDataProcessing(node, show_plots, enable, dir_)
-
-        if data.dir_names is None:
-            with open(dir_ / "rssi.log", "w") as rssi_log:
-                data.log_rssi(rssi_log.write)
-            with open(dir_ / "ranging.log", "w") as ranging_log:
-                data.log_ranging(ranging_log.write)
-            with open(dir_ / "rx_power.log", "w") as power_log:
-                data.log_rx_power(power_log.write)
-            with open(dir_ / "uwb_stats.log", "w") as stats_log:
-                data.log_uwb_stats(stats_log.write)
-        else:
-            for run in data.dir_names:
-                save_dir = dir_ / run
-                with open(save_dir / "rssi.log", "w") as rssi_log:
-                    data.log_rssi(rssi_log.write, run)
-                with open(save_dir / "ranging.log", "w") as ranging_log:
-                    data.log_ranging(ranging_log.write, run)
-                with open(save_dir / "rx_power.log", "w") as power_log:
-                    data.log_rx_power(power_log.write, run)
-                with open(save_dir / "uwb_stats.log", "w") as stats_log:
-                    data.log_uwb_stats(stats_log.write, run)
-        data.plot()
+    results = Path("./results")
+    results.mkdir(exist_ok=True)
+    manifest = BuildManifest(results)
+    plot_settings = dataclasses.asdict(enable) | {"layout": layout.value}
+
+    if by_config and selected:
+        inputs = manifest.hash_inputs([capture.path for capture in selected])
+        if force or manifest.is_stale("configuration_stats", inputs, {}):
+            fname = results / "configuration_stats.csv"
+            ConfigurationStats(selected, compact).stats.to_csv(fname)
+            manifest.record("configuration_stats", inputs, {}, [fname])
+            manifest.save()
+
+    jobs = plan_runs(nodes, manifest, results, plot_settings, force, show_plots)
+    if pipeline is not None:
+        run_pipeline(jobs, manifest, enable, layout, plot_settings, compact, pipeline)
+        return
+
+    # Shared by all nodes, so the frames of earlier nodes are evicted first
+    raw_cache = RawDataCache(memory_budget) if memory_budget is not None else None
+    # Nodes are processed one at a time. The fits of the series are independent, so solving the stale runs of each
+    # node in one batch gives the same models as a single solve over the whole archive.
+    for node in dict.fromkeys(job.node for job in jobs):
+        node_jobs = [job for job in jobs if job.node == node]
+        captures = [capture for job in node_jobs for capture in job.captures]
+        data = BelugaDataProcessing(node, show_plots, enable, create_dir(node), layout=layout, captures=captures,
+                                    compact=compact, raw_cache=raw_cache)
+
+        for job in node_jobs:
+            if job.logs_stale:
+                manifest.record(f"{job.artifact}/logs", job.inputs, {"logs": list(UwbStats.LOGS)},
+                                data.run_stats(job.run).write_logs(job.save_dir))
+
+        plot_jobs = [job for job in node_jobs if job.plots_stale]
+        if enable.path_loss:
+            fits = fit_runs([path_loss_inputs(data.run_stats(job.run)) for job in plot_jobs])
+            for job, fit in zip(plot_jobs, fits):
+                job.path_loss = fit
+        for job in plot_jobs:
+            manifest.clear(f"{job.artifact}/plots")
+            manifest.record(f"{job.artifact}/plots", job.inputs, plot_settings, data.plot(job.run, job.path_loss))
+        manifest.save()
+        # Freed before the next node is loaded
+        del data
 
 if __name__ == "__main__":
-    main(SHOW_PLOTS, ENABLE)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--force", action="store_true",
+                        help="Regenerate every artifact, even if its inputs and settings are unchanged")
+    parser.add_argument("--layout", choices=[layout.value for layout in PlotLayout], default=LAYOUT.value,
+                        help="Render one figure per plot, a single dashboard figure or a single HTML report per run")
+    parser.add_argument("--compact", action="store_true", default=COMPACT,
+                        help="Keep samples with packed event flags and downcast diagnostics to save memory")
+    parser.add_argument("--by-config", action="store_true",
+                        help="Also write statistics grouped by radio configuration and distance")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Overlap parsing, statistics, log writing and plotting of different runs")
+    parser.add_argument("--memory-budget", type=int, metavar="MIB",
+                        help="Keep at most this many MiB of per-sample data in memory, evicted data is cached on "
+                             "disk and reloaded when needed (not with --pipeline)")
+    for stage, workers in dataclasses.asdict(StageConcurrency()).items():
+        parser.add_argument(f"--{stage.replace('_', '-')}", type=int, default=workers,
+                            help=f"Pipelined mode: number of {stage} workers" if stage != "queue_depth" else
+                            "Pipelined mode: number of runs queued between two stages")
+    parser.add_argument("--nodes", type=int, nargs=2, metavar=("FIRST", "LAST"), help="Only process these nodes")
+    parser.add_argument("--distances", type=int, nargs=2, metavar=("MIN", "MAX"),
+                        help="Only use captures within this distance range (m)")
+    parser.add_argument("--runs", nargs="+", help="Only process these runs")
+    parser.add_argument("--channel", type=int, help="Only use captures on this UWB channel")
+    args = parser.parse_args()
+    query = CaptureQuery(nodes=args.nodes, distances=args.distances, runs=args.runs, channel=args.channel)
+    pipeline = None
+    if args.pipeline:
+        pipeline = StageConcurrency(**{stage: getattr(args, stage) for stage in dataclasses.asdict(StageConcurrency())})
+    memory_budget = args.memory_budget << 20 if args.memory_budget is not None else MEMORY_BUDGET
+    main(SHOW_PLOTS, ENABLE, args.force, PlotLayout(args.layout), query, args.compact, args.by_config, pipeline,
+         memory_budget)
@@ -0,0 +1,77 @@
+import dataclasses
+import numpy as np
+from process_data import UwbStats
+
+
+# Stats frame metrics that can be fitted, see `path_loss_inputs`
+PATH_LOSS_METRICS = ("rssi", "rx_pow", "fp")
+
+
+@dataclasses.dataclass(frozen=True)
+class PathLoss:
+    # Log-distance model P(d) = reference_power - 10 * exponent * log10(d / 1 m) with residual deviation `sigma` (dB)
+    reference_power: float
+    exponent: float
+    sigma: float
+
+    def predict(self, distances) -> np.ndarray:
+        return self.reference_power - 10 * self.exponent * np.log10(np.asarray(distances, dtype=float))
+
+
+@dataclasses.dataclass(frozen=True)
+class PathLossInput:
+    # Per-distance sample count, mean and sum of squared deviations of one metric of one run. The least squares
+    # fit only depends on these, so inputs of every run of every node can be kept for one batched solve.
+    distances: np.ndarray
+    counts: np.ndarray
+    means: np.ndarray
+    m2: np.ndarray
+
+
+def fit_path_loss(inputs: list[PathLossInput]) -> list[PathLoss]:
+    # All inputs are solved together: the per-input normal equations of the 2-parameter least squares problem are
+    # accumulated with bincount over the concatenated per-distance moments
+    if not inputs:
+        return []
+    group = np.repeat(np.arange(len(inputs)), [len(i.distances) for i in inputs])
+    x = -10 * np.log10(np.concatenate([np.asarray(i.distances, dtype=float) for i in inputs]))
+    n = np.concatenate([np.asarray(i.counts, dtype=float) for i in inputs])
+    y = np.concatenate([np.asarray(i.means, dtype=float) for i in inputs])
+    m2 = np.concatenate([np.asarray(i.m2, dtype=float) for i in inputs])
+
+    count = np.bincount(group, n, len(inputs))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_mean = np.bincount(group, n * x, len(inputs)) / count
+        y_mean = np.bincount(group, n * y, len(inputs)) / count
+        dx = x - x_mean[group]
+        exponent = np.bincount(group, n * dx * (y - y_mean[group]), len(inputs)) / \
+            np.bincount(group, n * dx * dx, len(inputs))
+        reference_power = y_mean - exponent * x_mean
+        # Residuals around the fit are the spread within each distance plus the miss of each distance mean
+        residuals = y - reference_power[group] - exponent[group] * x
+        sigma = np.sqrt(np.bincount(group, m2 + n * residuals * residuals, len(inputs)) / (count - 2))
+
+    return [PathLoss(float(p), float(e), float(s)) for p, e, s in zip(reference_power, exponent, sigma)]
+
+
+def path_loss_inputs(stats: UwbStats) -> dict[str, PathLossInput]:
+    # Built from the stats frame only, so no per-sample data is read (or reloaded when evicted)
+    frame = stats.stats
+    counts = frame["samples"].to_numpy()
+    distances = frame["range"].to_numpy()
+    inputs = {}
+    for metric in PATH_LOSS_METRICS:
+        var = frame[f"{metric}_var"].to_numpy()
+        m2 = np.where(counts > 1, var * (counts - 1), 0.0)
+        inputs[metric] = PathLossInput(distances, counts, frame[f"{metric}_mean"].to_numpy(), m2)
+    return inputs
+
+
+def fit_runs(inputs: list[dict[str, PathLossInput]]) -> list[dict[str, PathLoss]]:
+    # One fit per metric for every entry of `inputs`, e.g. all runs of all nodes
+    fits = {metric: fit_path_loss([run[metric] for run in inputs]) for metric in PATH_LOSS_METRICS}
+    return [{metric: fits[metric][i] for metric in PATH_LOSS_METRICS} for i in range(len(inputs))]
+
+
+def fit_stats(stats: list[UwbStats]) -> list[dict[str, PathLoss]]:
+    return fit_runs([path_loss_inputs(s) for s in stats])
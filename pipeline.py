@@ -0,0 +1,161 @@
+import concurrent.futures
+import dataclasses
+import multiprocessing
+import queue
+import threading
+from collections.abc import Callable
+from pathlib import Path
+from build_manifest import BuildManifest
+from capture_catalog import CaptureRecord
+from data_representation import GraphEnable, DataRepresentation, PlotLayout, PlotSeries
+from import_data import UwbData
+from path_loss import PathLoss, fit_runs, path_loss_inputs
+from process_data import UwbStats
+
+
+@dataclasses.dataclass
+class StageConcurrency:
+    parse: int = 2
+    stats: int = 1
+    logs: int = 1
+    plots: int = 2
+    # Jobs waiting between two stages, together with the workers this bounds how many runs are in memory
+    queue_depth: int = 2
+
+
+@dataclasses.dataclass
+class RunJob:
+    node: int
+    run: str | None
+    captures: list[CaptureRecord]
+    save_dir: Path
+    artifact: str
+    inputs: dict[str, str]
+    logs_stale: bool
+    plots_stale: bool
+    data: dict[int, UwbData] | None = None
+    stats: UwbStats | None = None
+    series: PlotSeries | None = None
+    path_loss: dict[str, PathLoss] | None = None
+
+
+_DONE = object()
+
+
+class _Stage:
+    def __init__(self, name: str, work: Callable[[RunJob], None], workers: int, depth: int,
+                 errors: list[BaseException]):
+        if workers <= 0:
+            raise ValueError(f"Invalid number of {name} workers: {workers}")
+        self.inbox: queue.Queue = queue.Queue(maxsize=depth)
+        self._work = work
+        self._errors = errors
+        self._downstream: list["_Stage"] = []
+        self._alive = workers
+        self._lock = threading.Lock()
+        self._threads = [threading.Thread(target=self._loop, name=f"{name}-{i}", daemon=True)
+                         for i in range(workers)]
+
+    def feeds(self, *stages: "_Stage"):
+        self._downstream += stages
+
+    def start(self):
+        for thread in self._threads:
+            thread.start()
+
+    def close(self):
+        for _ in self._threads:
+            self.inbox.put(_DONE)
+
+    def join(self):
+        for thread in self._threads:
+            thread.join()
+
+    def _loop(self):
+        while (job := self.inbox.get()) is not _DONE:
+            try:
+                self._work(job)
+            except BaseException as e:
+                # The job is dropped but the worker keeps draining its queue so upstream stages never block
+                self._errors.append(e)
+        with self._lock:
+            self._alive -= 1
+            last = self._alive == 0
+        if last:
+            for stage in self._downstream:
+                stage.close()
+
+
+def _init_plot_worker():
+    import matplotlib
+    matplotlib.use("Agg")
+
+
+def _render_plots(series: PlotSeries, enable: GraphEnable, save_dir: Path, layout: PlotLayout,
+                  path_loss: dict[str, PathLoss] | None) -> list[Path]:
+    return DataRepresentation(series, False, enable, save_dir, layout, path_loss).plot()
+
+
+def run_pipeline(jobs: list[RunJob], manifest: BuildManifest, enable: GraphEnable, layout: PlotLayout,
+                 plot_settings: dict[str, bool | str], compact: bool = False,
+                 concurrency: StageConcurrency = StageConcurrency()):
+    # parse -> stats -> (logs, plots). Each stage has its own workers and a bounded inbox, so the next runs are
+    # parsed while earlier ones are rendered. Plots are rendered in worker processes since pyplot is not thread safe.
+    errors: list[BaseException] = []
+    manifest_lock = threading.Lock()
+    plot_pool = concurrent.futures.ProcessPoolExecutor(max_workers=concurrency.plots,
+                                                       mp_context=multiprocessing.get_context("spawn"),
+                                                       initializer=_init_plot_worker)
+
+    def record(job: RunJob, kind: str, settings: dict[str, bool | str], outputs: list[Path]):
+        with manifest_lock:
+            manifest.record(f"{job.artifact}/{kind}", job.inputs, settings, outputs)
+            manifest.save()
+
+    def parse(job: RunJob):
+        job.data = {capture.distance: UwbData(str(capture.path), compact) for capture in job.captures}
+        stats_stage.inbox.put(job)
+
+    def compute(job: RunJob):
+        job.stats = UwbStats(job.data)
+        job.data = None
+        if job.plots_stale:
+            # Fitted per run so the job can be plotted right away, series are fitted independently anyway
+            job.path_loss = fit_runs([path_loss_inputs(job.stats)])[0] if enable.path_loss else None
+            job.series = PlotSeries.from_stats(job.stats)
+            plots_stage.inbox.put(job)
+        if job.logs_stale:
+            logs_stage.inbox.put(job)
+        else:
+            job.stats = None
+
+    def write_logs(job: RunJob):
+        record(job, "logs", {"logs": list(UwbStats.LOGS)}, job.stats.write_logs(job.save_dir))
+        job.stats = None
+
+    def plot(job: RunJob):
+        with manifest_lock:
+            manifest.clear(f"{job.artifact}/plots")
+        outputs = plot_pool.submit(_render_plots, job.series, enable, job.save_dir, layout, job.path_loss).result()
+        job.series = None
+        record(job, "plots", plot_settings, outputs)
+
+    parse_stage = _Stage("parse", parse, concurrency.parse, concurrency.queue_depth, errors)
+    stats_stage = _Stage("stats", compute, concurrency.stats, concurrency.queue_depth, errors)
+    logs_stage = _Stage("logs", write_logs, concurrency.logs, concurrency.queue_depth, errors)
+    plots_stage = _Stage("plots", plot, concurrency.plots, concurrency.queue_depth, errors)
+    parse_stage.feeds(stats_stage)
+    stats_stage.feeds(logs_stage, plots_stage)
+
+    stages = [parse_stage, stats_stage, logs_stage, plots_stage]
+    with plot_pool:
+        for stage in stages:
+            stage.start()
+        for job in jobs:
+            parse_stage.inbox.put(job)
+        parse_stage.close()
+        for stage in stages:
+            stage.join()
+
+    if errors:
+        raise errors[0]
@@ -1,14 +1,128 @@
+import numpy as np
 import pandas as pd
 from import_data import UwbData
-import statistics
-import math
-from typing import Callable
+from channel_quality import LOS, NLOS, UNCERTAIN, channel_quality
+from pathlib import Path
+from typing import Callable, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from capture_catalog import CaptureRecord
+
+
+def pulse_rate_constant(pulse_rate: int) -> float:
+    return 121.74 if pulse_rate == 1 else 113.77
+
+
+def rx_power_level(cir: np.ndarray, preamble_count: np.ndarray, a: float) -> np.ndarray:
+    cir = np.asarray(cir, dtype=float)
+    preamble_count = np.asarray(preamble_count, dtype=float)
+    cir = np.where(cir <= 0, 1e-9, cir)
+    return (10 * np.log10((cir * (2 ** 17)) / (preamble_count ** 2))) - a
+
+
+def first_path_power_level(fp_amp1: np.ndarray, fp_amp2: np.ndarray, fp_amp3: np.ndarray,
+                           preamble_count: np.ndarray, a: float) -> np.ndarray:
+    fp_amp1 = np.asarray(fp_amp1, dtype=float)
+    fp_amp2 = np.asarray(fp_amp2, dtype=float)
+    fp_amp3 = np.asarray(fp_amp3, dtype=float)
+    preamble_count = np.asarray(preamble_count, dtype=float)
+    return (10 * np.log10(((fp_amp1 ** 2) + (fp_amp2 ** 2) + (fp_amp3 ** 2)) / (preamble_count ** 2))) - a
+
+
+def packet_reception_rate(sample_count: int, failed_responses: int, failed_reports: int) -> tuple[float, int, int]:
+    successful_receptions = (sample_count * 2) + failed_reports
+    failed_receptions = failed_responses + failed_reports
+    total_receptions = successful_receptions + failed_receptions
+    return (1 - (failed_receptions / total_receptions)) * 100, failed_receptions, total_receptions
+
+
+def failed_stages(drops: pd.DataFrame) -> tuple[int, int, int, int]:
+    # Failed polls, responses, finals and reports
+    failed = [0, 0, 0, 0]
+    for stage, count in zip(drops["Stage"], drops["Count"]):
+        failed[stage] += int(count)
+    return failed[0], failed[1], failed[2], failed[3]
+
+
+def fused_stats(block: np.ndarray, median: bool = True) -> dict[str, np.ndarray]:
+    # Statistics of every row of a (metrics, samples) block. The moments come from sums of the samples shifted by
+    # the first one, which keeps the single pass variance accurate when the mean is large compared to the spread.
+    # All medians come from one partition of the shifted block.
+    block = np.asarray(block, dtype=np.float64)
+    count = block.shape[1]
+    origin = block[:, 0] if count else np.zeros(block.shape[0])
+    shifted = block - origin[:, None]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        total = shifted.sum(axis=1)
+        m2 = np.maximum(np.einsum("ij,ij->i", shifted, shifted) - total * total / count, 0)
+        var = m2 / (count - 1) if count > 1 else np.full(block.shape[0], np.nan)
+        stats = {
+            "mean": origin + total / count,
+            "stddev": np.sqrt(var),
+            "var": var,
+            "m2": m2,
+        }
+    if median:
+        if count:
+            middle = np.partition(shifted, [(count - 1) // 2, count // 2], axis=1)
+            stats["median"] = origin + (middle[:, (count - 1) // 2] + middle[:, count // 2]) / 2
+        else:
+            stats["median"] = np.full(block.shape[0], np.nan)
+    return stats
+
+
+class PowerSeries:
+    def __init__(self, distances: list[int], rx_pow: list[np.ndarray], fp: list[np.ndarray]):
+        # Per-sample power of every distance back to back in one block (row 0 RX power, row 1 first path power),
+        # distance i owns the columns offsets[i]:offsets[i + 1]
+        self._index: dict[int, int] = {distance: i for i, distance in enumerate(distances)}
+        self._offsets = np.zeros(len(distances) + 1, dtype=np.int64)
+        np.cumsum([len(x) for x in rx_pow], out=self._offsets[1:])
+        self._values = np.empty((2, self._offsets[-1]), dtype=np.float64)
+        for i, (rx, fp_) in enumerate(zip(rx_pow, fp)):
+            self._values[0, self._offsets[i]:self._offsets[i + 1]] = rx
+            self._values[1, self._offsets[i]:self._offsets[i + 1]] = fp_
+        self._values.flags.writeable = False
+
+    def _span(self, distance: int) -> slice:
+        i = self._index[distance]
+        return slice(self._offsets[i], self._offsets[i + 1])
+
+    def rx_pow(self, distance: int) -> np.ndarray:
+        return self._values[0, self._span(distance)]
+
+    def fp(self, distance: int) -> np.ndarray:
+        return self._values[1, self._span(distance)]
+
+    def rx_fp_difference(self, distance: int) -> np.ndarray:
+        span = self._span(distance)
+        return self._values[0, span] - self._values[1, span]
+
+    @property
+    def distances(self) -> list[int]:
+        return list(self._index.keys())
+
+    @property
+    def offsets(self) -> np.ndarray:
+        return self._offsets
+
+    @property
+    def values(self) -> np.ndarray:
+        return self._values
 
 
 class UwbStats:
+    # Files written by `write_logs`
+    LOGS = ("rssi.log", "ranging.log", "rx_power.log", "uwb_stats.log", "channel_quality.log")
+
     def __init__(self, data: dict[int, UwbData]):
-        self._data: dict[int, UwbData] = data
-        stat_data: dict[str, list[float | int | list[float]]] = {
+        self._data: dict[int, UwbData] | None = data
+        # Set by `attach_cache`, a `RawDataCache` may evict the per-sample data (`_data` and `_power`), which is
+        # then reloaded on access
+        self._data_cache = None
+        self._rx_pow: list[np.ndarray] = []
+        self._fp: list[np.ndarray] = []
+        stat_data: dict[str, list[float | int]] = {
             "range": [],
             "range_mean": [],
             "range_median": [],
@@ -22,27 +136,32 @@ class UwbStats:
             "rx_pow_median": [],
             "rx_pow_stddev": [],
             "rx_pow_var": [],
-            "rx_pow": [],
             "fp_mean": [],
             "fp_median": [],
             "fp_stddev": [],
             "fp_var": [],
-            "fp": [],
             "prr": [],
             "dropped_rx": [],
             "total_rx": [],
             "mean_cir": [],
+            "snr_mean": [],
+            "los_rate": [],
+            "uncertain_rate": [],
+            "nlos_rate": [],
+            "range_err_los": [],
+            "range_err_nlos": [],
+            "samples": [],
             # Add new stats to the end...
         }
 
         for range_, data_ in sorted(self._data.items(), key=lambda kv: kv[0]):
             stat_data["range"] += [range_]
-            self._compute_range_stats(range_, stat_data)
-            self._compute_rssi_states(range_, stat_data)
-            self._compute_uwb_rx_power(range_, stat_data)
-            self._compute_uwb_fp_power(range_, stat_data)
+            self._compute_sample_stats(range_, stat_data)
             self._compute_prr(range_, stat_data)
+            self._compute_channel_quality(range_, stat_data)
         self._stats = pd.DataFrame(stat_data)
+        self._power = PowerSeries(stat_data["range"], self._rx_pow, self._fp)
+        self._rx_pow, self._fp = [], []
 
     def log_range(self, logger: Callable[[any], None] | None):
         if logger is None:
@@ -51,12 +170,12 @@ class UwbStats:
             ending = ""
         else:
             ending = "\n"
-        for data in self._stats.values:
-            logger(f"--- Statistics for UWB Ranging at {data[0]} meters ---{ending}")
-            logger(f"Mean Range: {data[1]}{ending}")
-            logger(f"Median Range: {data[2]}{ending}")
-            logger(f"Range Standard Deviation: {data[3]}{ending}")
-            logger(f"Range Variance: {data[4]}{ending}")
+        for data in self._stats.to_dict("records"):
+            logger(f"--- Statistics for UWB Ranging at {data['range']} meters ---{ending}")
+            logger(f"Mean Range: {data['range_mean']}{ending}")
+            logger(f"Median Range: {data['range_median']}{ending}")
+            logger(f"Range Standard Deviation: {data['range_stddev']}{ending}")
+            logger(f"Range Variance: {data['range_var']}{ending}")
             logger(ending)
 
     def log_rssi(self, logger: Callable[[any], None] | None):
@@ -66,12 +185,12 @@ class UwbStats:
             ending = ""
         else:
             ending = "\n"
-        for data in self._stats.values:
-            logger(f"--- Statistics for BLE RSSI at {data[0]} meters ---{ending}")
-            logger(f"Mean RSSI: {data[5]}{ending}")
-            logger(f"Median RSSI: {data[6]}{ending}")
-            logger(f"RSSI Standard Deviation: {data[7]}{ending}")
-            logger(f"RSSI Variance: {data[8]}{ending}")
+        for data in self._stats.to_dict("records"):
+            logger(f"--- Statistics for BLE RSSI at {data['range']} meters ---{ending}")
+            logger(f"Mean RSSI: {data['rssi_mean']}{ending}")
+            logger(f"Median RSSI: {data['rssi_median']}{ending}")
+            logger(f"RSSI Standard Deviation: {data['rssi_stddev']}{ending}")
+            logger(f"RSSI Variance: {data['rssi_var']}{ending}")
             logger(ending)
 
     def log_uwb_power(self, logger: Callable[[any], None] | None):
@@ -81,16 +200,16 @@ class UwbStats:
             ending = ""
         else:
             ending = "\n"
-        for data in self._stats.values:
-            logger(f"--- Statistics for UWB Power at {data[0]} meters ---{ending}")
-            logger(f"Mean RX Power: {data[9]}{ending}")
-            logger(f"Median RX Power: {data[10]}{ending}")
-            logger(f"RX Power Standard Deviation: {data[11]}{ending}")
-            logger(f"RX Power Variance: {data[12]}{ending}")
-            logger(f"Mean First Path Power: {data[14]}{ending}")
-            logger(f"Median First Path Power: {data[15]}{ending}")
-            logger(f"First Path Power Standard Deviation: {data[16]}{ending}")
-            logger(f"First Path Power Variance: {data[17]}{ending}")
+        for data in self._stats.to_dict("records"):
+            logger(f"--- Statistics for UWB Power at {data['range']} meters ---{ending}")
+            logger(f"Mean RX Power: {data['rx_pow_mean']}{ending}")
+            logger(f"Median RX Power: {data['rx_pow_median']}{ending}")
+            logger(f"RX Power Standard Deviation: {data['rx_pow_stddev']}{ending}")
+            logger(f"RX Power Variance: {data['rx_pow_var']}{ending}")
+            logger(f"Mean First Path Power: {data['fp_mean']}{ending}")
+            logger(f"Median First Path Power: {data['fp_median']}{ending}")
+            logger(f"First Path Power Standard Deviation: {data['fp_stddev']}{ending}")
+            logger(f"First Path Power Variance: {data['fp_var']}{ending}")
             logger(ending)
 
     def log_uwb_prr(self, logger: Callable[[any], None] | None):
@@ -100,89 +219,203 @@ class UwbStats:
             ending = ""
         else:
             ending = "\n"
-        for data in self._stats.values:
-            logger(f"--- Statistics for UWB PRR at {data[0]} meters ---{ending}")
-            logger(f"Packet Reception Rate: {data[19]}{ending}")
-            logger(f"Dropped Receptions: {data[20]}{ending}")
-            logger(f"Total Receptions: {data[21]}{ending}")
+        for data in self._stats.to_dict("records"):
+            logger(f"--- Statistics for UWB PRR at {data['range']} meters ---{ending}")
+            logger(f"Packet Reception Rate: {data['prr']}{ending}")
+            logger(f"Dropped Receptions: {data['dropped_rx']}{ending}")
+            logger(f"Total Receptions: {data['total_rx']}{ending}")
             logger(ending)
 
-    def _compute_range_stats(self, range_: int, stats: dict[str, float | int | list[float]]):
-        stats["range_mean"] += [self._data[range_].samples["RANGE"].mean()]
-        stats["range_median"] += [self._data[range_].samples["RANGE"].median()]
-        stats["range_stddev"] += [self._data[range_].samples["RANGE"].std()]
-        stats["range_var"] += [self._data[range_].samples["RANGE"].var()]
-
-    def _compute_rssi_states(self, range_: int, stats: dict[str, float | int | list[float]]):
-        stats["rssi_mean"] += [self._data[range_].samples["RSSI"].mean()]
-        stats["rssi_median"] += [self._data[range_].samples["RSSI"].median()]
-        stats["rssi_stddev"] += [self._data[range_].samples["RSSI"].std()]
-        stats["rssi_var"] += [self._data[range_].samples["RSSI"].var()]
-
-    def _compute_uwb_rx_power(self, range_: int, stats: dict[str, float | int | list[float]]):
-        A = 121.74 if self._data[range_].configs["Pulse rate"][0] == 1 else 113.77
-        rx_level = []
-        for C, N in zip(self._data[range_].samples["MAX_GROWTH_CIR"], self._data[range_].samples["RX_PREAMBLE_CNT"]):
-            if C <= 0:
-                C = 1e-9
-            rx_level += [(10 * math.log10((C * (2 ** 17)) / (N ** 2))) - A]
-        stats["rx_pow_mean"] += [statistics.mean(rx_level)]
-        stats["rx_pow_median"] += [statistics.median(rx_level)]
-        stats["rx_pow_stddev"] += [statistics.stdev(rx_level)]
-        stats["rx_pow_var"] += [statistics.variance(rx_level)]
-        stats["rx_pow"] += [rx_level]
-        stats["mean_cir"] += [self._data[range_].samples["MAX_GROWTH_CIR"].mean()]
-
-    def _compute_uwb_fp_power(self, range_: int, stats: dict[str, float | int | list[float]]):
-        A = 121.74 if self._data[range_].configs["Pulse rate"][0] == 1 else 113.77
-        fp_level = []
-        for F1, F2, F3, N in zip(self._data[range_].samples["FIRST_PATH_AMP1"],
-                                 self._data[range_].samples["FIRST_PATH_AMP2"],
-                                 self._data[range_].samples["FIRST_PATH_AMP3"],
-                                 self._data[range_].samples["RX_PREAMBLE_CNT"]):
-            fp_level += [(10 * math.log10(((F1 ** 2) + (F2 ** 2) + (F3 ** 2)) / (N ** 2))) - A]
-        stats["fp_mean"] += [statistics.mean(fp_level)]
-        stats["fp_median"] += [statistics.median(fp_level)]
-        stats["fp_stddev"] += [statistics.stdev(fp_level)]
-        stats["fp_var"] += [statistics.variance(fp_level)]
-        stats["fp"] += [fp_level]
-
-    def _compute_prr(self, range_: int, stats: dict[str, float | int | list[float]]):
-        failed_polls: int = 0
-        failed_responses: int = 0
-        failed_finals: int = 0
-        failed_reports: int = 0
-
-        for stage, count in zip(self._data[range_].drops["Stage"], self._data[range_].drops["Count"]):
-            match stage:
-                case 0:
-                    failed_polls += count
-                case 1:
-                    failed_responses += count
-                case 2:
-                    failed_finals += count
-                case 3:
-                    failed_reports += count
-
-        successful_receptions = (len(self._data[range_].samples["RANGE"]) * 2) + failed_reports
-        failed_receptions = failed_responses + failed_reports
-        total_receptions = successful_receptions + failed_receptions
-
-        stats["prr"] += [(1 - (failed_receptions / total_receptions)) * 100]
+    def log_channel_quality(self, logger: Callable[[any], None] | None):
+        if logger is None:
+            return
+        if logger == print:
+            ending = ""
+        else:
+            ending = "\n"
+        for data in self._stats.to_dict("records"):
+            logger(f"--- Statistics for UWB Channel Quality at {data['range']} meters ---{ending}")
+            logger(f"Mean SNR: {data['snr_mean']}{ending}")
+            logger(f"LOS Rate: {data['los_rate']}{ending}")
+            logger(f"Uncertain Rate: {data['uncertain_rate']}{ending}")
+            logger(f"NLOS Rate: {data['nlos_rate']}{ending}")
+            logger(f"LOS Mean Absolute Range Error: {data['range_err_los']}{ending}")
+            logger(f"NLOS Mean Absolute Range Error: {data['range_err_nlos']}{ending}")
+            logger(ending)
+
+    def write_logs(self, save_dir: Path) -> list[Path]:
+        logs = [save_dir / name for name in self.LOGS]
+        with open(logs[0], "w") as rssi_log:
+            self.log_rssi(rssi_log.write)
+        with open(logs[1], "w") as ranging_log:
+            self.log_range(ranging_log.write)
+        with open(logs[2], "w") as power_log:
+            self.log_uwb_power(power_log.write)
+        with open(logs[3], "w") as stats_log:
+            self.log_uwb_prr(stats_log.write)
+        with open(logs[4], "w") as channel_log:
+            self.log_channel_quality(channel_log.write)
+        return logs
+
+    def _compute_sample_stats(self, range_: int, stats: dict[str, float | int]):
+        # Range, RSSI, CIR and both power levels of the capture are stacked into one block for `fused_stats`
+        samples = self._data[range_].samples
+        A = pulse_rate_constant(self._data[range_].configs["Pulse rate"][0])
+        block = np.empty((5, len(samples)), dtype=np.float64)
+        block[0] = samples["RANGE"]
+        block[1] = samples["RSSI"]
+        block[2] = samples["MAX_GROWTH_CIR"]
+        block[3] = rx_power_level(samples["MAX_GROWTH_CIR"], samples["RX_PREAMBLE_CNT"], A)
+        block[4] = first_path_power_level(samples["FIRST_PATH_AMP1"], samples["FIRST_PATH_AMP2"],
+                                          samples["FIRST_PATH_AMP3"], samples["RX_PREAMBLE_CNT"], A)
+        sample_stats = fused_stats(block)
+        for row, name in ((0, "range"), (1, "rssi"), (3, "rx_pow"), (4, "fp")):
+            for key in ("mean", "median", "stddev", "var"):
+                stats[f"{name}_{key}"] += [float(sample_stats[key][row])]
+        stats["mean_cir"] += [float(sample_stats["mean"][2])]
+        self._rx_pow += [block[3]]
+        self._fp += [block[4]]
+
+    def _compute_prr(self, range_: int, stats: dict[str, float | int]):
+        failed_polls, failed_responses, failed_finals, failed_reports = failed_stages(self._data[range_].drops)
+
+        prr, failed_receptions, total_receptions = packet_reception_rate(len(self._data[range_].samples["RANGE"]),
+                                                                         failed_responses, failed_reports)
+
+        stats["prr"] += [prr]
         stats["dropped_rx"] += [failed_receptions]
         stats["total_rx"] += [total_receptions]
+        stats["samples"] += [len(self._data[range_].samples)]
+
+    def _compute_channel_quality(self, range_: int, stats: dict[str, float | int]):
+        samples = self._data[range_].samples
+        quality = channel_quality(samples, self._rx_pow[-1] - self._fp[-1])
+        codes = quality["channel"].cat.codes.to_numpy()
+        error = np.abs(samples["RANGE"].to_numpy() - range_)
+        counts = np.bincount(codes, minlength=3)
+        error_sums = np.bincount(codes, error, minlength=3)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            stats["snr_mean"] += [float(np.mean(quality["snr"].to_numpy()))]
+            stats["los_rate"] += [counts[LOS] / len(codes) * 100]
+            stats["uncertain_rate"] += [counts[UNCERTAIN] / len(codes) * 100]
+            stats["nlos_rate"] += [counts[NLOS] / len(codes) * 100]
+            stats["range_err_los"] += [error_sums[LOS] / counts[LOS]]
+            stats["range_err_nlos"] += [error_sums[NLOS] / counts[NLOS]]
+
+    def attach_cache(self, cache):
+        self._data_cache = cache
+
+    def evict_data(self) -> tuple[dict[int, UwbData], PowerSeries]:
+        evicted = self._data, self._power
+        self._data, self._power = None, None
+        return evicted
+
+    def _load_data(self):
+        if self._data is None:
+            self._data, self._power = self._data_cache.load(self)
+        elif self._data_cache is not None:
+            self._data_cache.touch(self)
+
+    @property
+    def nbytes(self) -> int:
+        # Per-sample data that a `RawDataCache` accounts for
+        return sum(data.nbytes for data in self.data.values()) + self.power.values.nbytes
 
     @property
     def data(self) -> dict[int, UwbData]:
+        self._load_data()
         return self._data
 
     @property
     def stats(self) -> pd.DataFrame:
         return self._stats
 
+    @property
+    def power(self) -> PowerSeries:
+        self._load_data()
+        return self._power
+
     @property
     def distances(self) -> list[int]:
-        return list(self._data.keys())
+        return self._stats["range"].tolist()
+
+
+class ConfigurationStats:
+    CONFIG_KEYS = ("channel", "data_rate", "pulse_rate", "preamble", "pac", "tx_power")
+
+    def __init__(self, captures: list["CaptureRecord"], compact: bool = False):
+        # All captures are stacked into one frame so every statistic is a single grouped pass
+        # over (configuration, distance) instead of a loop over captures
+        samples = []
+        drops = []
+        for i, capture in enumerate(captures):
+            data = UwbData(str(capture.path), compact)
+            samples += [data.samples[["RANGE", "RSSI", "MAX_GROWTH_CIR", "RX_PREAMBLE_CNT", "FIRST_PATH_AMP1",
+                                      "FIRST_PATH_AMP2", "FIRST_PATH_AMP3"]].assign(capture=i)]
+            drops += [data.drops[["Stage", "Count"]].assign(capture=i)]
+
+        keys = list(self.CONFIG_KEYS) + ["distance"]
+        table = pd.DataFrame([[getattr(capture, key) for key in keys] + [capture.node, capture.run]
+                              for capture in captures], columns=keys + ["node", "run"])
+
+        samples = pd.concat(samples, ignore_index=True)
+        capture_index = samples["capture"].to_numpy()
+        a = np.array([pulse_rate_constant(pulse_rate) for pulse_rate in table["pulse_rate"]])[capture_index]
+        samples["rx_pow"] = rx_power_level(samples["MAX_GROWTH_CIR"], samples["RX_PREAMBLE_CNT"], a)
+        samples["fp"] = first_path_power_level(samples["FIRST_PATH_AMP1"], samples["FIRST_PATH_AMP2"],
+                                               samples["FIRST_PATH_AMP3"], samples["RX_PREAMBLE_CNT"], a)
+        for key in keys:
+            samples[key] = table[key].to_numpy()[capture_index]
+
+        grouped = samples.groupby(keys, dropna=False)
+        stats = grouped.agg(
+            range_mean=("RANGE", "mean"), range_median=("RANGE", "median"),
+            range_stddev=("RANGE", "std"), range_var=("RANGE", "var"),
+            rssi_mean=("RSSI", "mean"), rssi_median=("RSSI", "median"),
+            rssi_stddev=("RSSI", "std"), rssi_var=("RSSI", "var"),
+            rx_pow_mean=("rx_pow", "mean"), rx_pow_median=("rx_pow", "median"),
+            rx_pow_stddev=("rx_pow", "std"), rx_pow_var=("rx_pow", "var"),
+            fp_mean=("fp", "mean"), fp_median=("fp", "median"),
+            fp_stddev=("fp", "std"), fp_var=("fp", "var"),
+            mean_cir=("MAX_GROWTH_CIR", "mean"),
+            samples=("RANGE", "size"),
+        )
+
+        # PRR counters are summed per capture first, then pooled per group
+        drops = pd.concat(drops, ignore_index=True)
+        failed = drops.pivot_table(index="capture", columns="Stage", values="Count", aggfunc="sum", fill_value=0)
+        failed = failed.reindex(index=range(len(captures)), columns=[1, 3], fill_value=0)
+        table["failed_responses"] = failed[1].to_numpy()
+        table["failed_reports"] = failed[3].to_numpy()
+        table["sample_count"] = np.bincount(capture_index, minlength=len(captures))
+        pooled = table.groupby(keys, dropna=False).agg(
+            failed_responses=("failed_responses", "sum"), failed_reports=("failed_reports", "sum"),
+            sample_count=("sample_count", "sum"), captures=("node", "size"), nodes=("node", "nunique"),
+        )
+        with np.errstate(invalid="ignore", divide="ignore"):
+            prr, dropped, total = packet_reception_rate(pooled["sample_count"], pooled["failed_responses"],
+                                                        pooled["failed_reports"])
+        # Groups whose captures hold no samples only show up in `pooled`
+        stats = stats.reindex(pooled.index)
+        stats["samples"] = stats["samples"].fillna(0).astype(int)
+        stats["prr"] = prr
+        stats["dropped_rx"] = dropped
+        stats["total_rx"] = total
+        stats["captures"] = pooled["captures"]
+        stats["nodes"] = pooled["nodes"]
+        self._stats = stats
+
+    def compare(self, metric: str) -> pd.DataFrame:
+        # One row per distance, one column per configuration
+        return self._stats[metric].unstack(list(self.CONFIG_KEYS))
+
+    @property
+    def stats(self) -> pd.DataFrame:
+        return self._stats
+
+    @property
+    def configurations(self) -> list[tuple[int | None, ...]]:
+        return list(self._stats.index.droplevel("distance").unique())
 
 
 if __name__ == "__main__":
@@ -193,3 +426,4 @@ if __name__ == "__main__":
     _data.log_rssi(print)
     _data.log_uwb_power(print)
     _data.log_uwb_prr(print)
+    _data.log_channel_quality(print)
@@ -0,0 +1,106 @@
+import dataclasses
+import itertools
+import pickle
+import shutil
+import tempfile
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+from process_data import UwbStats
+
+
+@dataclasses.dataclass
+class _Entry:
+    stats: weakref.ref
+    nbytes: int
+    resident: bool = True
+    path: Path | None = None
+
+
+class RawDataCache:
+    def __init__(self, budget: int, cache_dir: Path | None = None):
+        # `budget` bounds the bytes of per-sample data (`UwbStats.data` and `UwbStats.power`) kept in memory.
+        # Released stats are evicted least recently used first, their data is spilled to `cache_dir` once and read
+        # back on access.
+        if budget < 0:
+            raise ValueError(f"Invalid memory budget: {budget}")
+        self._budget = budget
+        if cache_dir is None:
+            cache_dir = Path(tempfile.mkdtemp(prefix="beluga-raw-"))
+            weakref.finalize(self, shutil.rmtree, cache_dir, True)
+        else:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+        self._dir = cache_dir
+        self._entries: dict[int, _Entry] = {}
+        # Resident entries that may be evicted, least recently used first
+        self._released: OrderedDict[int, None] = OrderedDict()
+        self._resident = 0
+        self._files = itertools.count()
+
+    def add(self, stats: UwbStats):
+        # The per-sample data of `stats` stays in memory until `release` is called
+        key = id(stats)
+        if key in self._entries:
+            return
+        self._entries[key] = _Entry(weakref.ref(stats), stats.nbytes)
+        self._resident += self._entries[key].nbytes
+        stats.attach_cache(self)
+        weakref.finalize(stats, self._forget, key)
+        self._evict()
+
+    def release(self, stats: UwbStats):
+        key = id(stats)
+        if self._entries[key].resident:
+            self._released[key] = None
+            self._released.move_to_end(key)
+        self._evict()
+
+    def touch(self, stats: UwbStats):
+        key = id(stats)
+        if key in self._released:
+            self._released.move_to_end(key)
+
+    def load(self, stats: UwbStats) -> tuple:
+        key = id(stats)
+        entry = self._entries[key]
+        with open(entry.path, "rb") as fd:
+            data = pickle.load(fd)
+        entry.resident = True
+        self._resident += entry.nbytes
+        self._released[key] = None
+        # The data being returned is kept even if it alone exceeds the budget
+        self._evict(keep=key)
+        return data
+
+    def _evict(self, keep: int | None = None):
+        for key in list(self._released):
+            if self._resident <= self._budget:
+                return
+            if key == keep:
+                continue
+            entry = self._entries[key]
+            data = entry.stats().evict_data()
+            if entry.path is None:
+                # Per-sample data never changes, so data that was spilled before is just dropped
+                entry.path = self._dir / f"{next(self._files)}.pickle"
+                with open(entry.path, "wb") as fd:
+                    pickle.dump(data, fd, protocol=pickle.HIGHEST_PROTOCOL)
+            del self._released[key]
+            entry.resident = False
+            self._resident -= entry.nbytes
+
+    def _forget(self, key: int):
+        entry = self._entries.pop(key)
+        self._released.pop(key, None)
+        if entry.resident:
+            self._resident -= entry.nbytes
+        if entry.path is not None:
+            entry.path.unlink(missing_ok=True)
+
+    @property
+    def budget(self) -> int:
+        return self._budget
+
+    @property
+    def resident(self) -> int:
+        return self._resident
@@ -0,0 +1,206 @@
+import dataclasses
+import math
+import numpy as np
+import pandas as pd
+from process_data import UwbStats, failed_stages, packet_reception_rate
+
+
+SUMMARY_METRICS = ("range", "rssi", "rx_pow", "fp", "cir")
+
+
+@dataclasses.dataclass(frozen=True)
+class Moments:
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+
+    @classmethod
+    def from_values(cls, values) -> "Moments":
+        values = np.asarray(values, dtype=float)
+        if len(values) == 0:
+            return cls()
+        mean = float(values.mean())
+        return cls(len(values), mean, float(((values - mean) ** 2).sum()))
+
+    def merge(self, other: "Moments") -> "Moments":
+        # Pairwise update of Chan et al., exact up to rounding for any split of the samples
+        if self.count == 0:
+            return other
+        if other.count == 0:
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        return Moments(count, self.mean + delta * other.count / count,
+                       self.m2 + other.m2 + (delta ** 2) * self.count * other.count / count)
+
+    @property
+    def var(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else math.nan
+
+    @property
+    def stddev(self) -> float:
+        return math.sqrt(self.var)
+
+
+class QuantileSketch:
+    # Logarithmically bucketed counts (DDSketch): any quantile is returned within `relative_accuracy` of a value
+    # of the right rank, and merging two sketches is adding their bucket counts
+    def __init__(self, relative_accuracy: float = 0.001):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError(f"Invalid relative accuracy: {relative_accuracy}")
+        self._relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._min_value = 1e-9
+        self._positive: dict[int, int] = {}
+        self._negative: dict[int, int] = {}
+        self._zero = 0
+
+    def _add_buckets(self, store: dict[int, int], magnitudes: np.ndarray):
+        keys, counts = np.unique(np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64), return_counts=True)
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            store[key] = store.get(key, 0) + count
+
+    def add(self, values):
+        values = np.asarray(values, dtype=float)
+        positive = values > self._min_value
+        negative = values < -self._min_value
+        self._add_buckets(self._positive, values[positive])
+        self._add_buckets(self._negative, -values[negative])
+        self._zero += int(len(values) - positive.sum() - negative.sum())
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        if other._relative_accuracy != self._relative_accuracy:
+            raise ValueError("Only sketches with the same relative accuracy can be merged")
+        merged = QuantileSketch(self._relative_accuracy)
+        for store, a, b in ((merged._positive, self._positive, other._positive),
+                            (merged._negative, self._negative, other._negative)):
+            store.update(a)
+            for key, count in b.items():
+                store[key] = store.get(key, 0) + count
+        merged._zero = self._zero + other._zero
+        return merged
+
+    def _value(self, key: int) -> float:
+        return 2 * self._gamma ** key / (self._gamma + 1)
+
+    def quantile(self, q: float) -> float:
+        if self.count == 0:
+            return math.nan
+        rank = q * (self.count - 1)
+        seen = 0
+        for key in sorted(self._negative, reverse=True):
+            seen += self._negative[key]
+            if seen > rank:
+                return -self._value(key)
+        seen += self._zero
+        if seen > rank:
+            return 0.0
+        for key in sorted(self._positive):
+            seen += self._positive[key]
+            if seen > rank:
+                return self._value(key)
+        return self._value(max(self._positive))
+
+    @property
+    def count(self) -> int:
+        return sum(self._positive.values()) + sum(self._negative.values()) + self._zero
+
+    def to_dict(self) -> dict:
+        return {"relative_accuracy": self._relative_accuracy, "zero": self._zero,
+                "positive": {str(k): v for k, v in self._positive.items()},
+                "negative": {str(k): v for k, v in self._negative.items()}}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "QuantileSketch":
+        sketch = cls(data["relative_accuracy"])
+        sketch._zero = data["zero"]
+        sketch._positive = {int(k): v for k, v in data["positive"].items()}
+        sketch._negative = {int(k): v for k, v in data["negative"].items()}
+        return sketch
+
+
+@dataclasses.dataclass(frozen=True)
+class DistanceSummary:
+    moments: dict[str, Moments]
+    sketches: dict[str, QuantileSketch]
+    failed_responses: int
+    failed_reports: int
+
+    def merge(self, other: "DistanceSummary") -> "DistanceSummary":
+        return DistanceSummary(
+            {metric: self.moments[metric].merge(other.moments[metric]) for metric in SUMMARY_METRICS},
+            {metric: self.sketches[metric].merge(other.sketches[metric]) for metric in SUMMARY_METRICS},
+            self.failed_responses + other.failed_responses,
+            self.failed_reports + other.failed_reports,
+        )
+
+    def stats(self) -> dict[str, float | int]:
+        # Same keys as a row of `UwbStats.stats`, medians are approximate
+        stats: dict[str, float | int] = {}
+        for metric in ("range", "rssi", "rx_pow", "fp"):
+            stats[f"{metric}_mean"] = self.moments[metric].mean
+            stats[f"{metric}_median"] = self.sketches[metric].quantile(0.5)
+            stats[f"{metric}_stddev"] = self.moments[metric].stddev
+            stats[f"{metric}_var"] = self.moments[metric].var
+        prr, dropped, total = packet_reception_rate(self.moments["range"].count, self.failed_responses,
+                                                    self.failed_reports)
+        stats["prr"] = prr
+        stats["dropped_rx"] = dropped
+        stats["total_rx"] = total
+        stats["mean_cir"] = self.moments["cir"].mean
+        return stats
+
+    def to_dict(self) -> dict:
+        return {"moments": {metric: dataclasses.asdict(m) for metric, m in self.moments.items()},
+                "sketches": {metric: s.to_dict() for metric, s in self.sketches.items()},
+                "failed_responses": self.failed_responses, "failed_reports": self.failed_reports}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "DistanceSummary":
+        return cls({metric: Moments(**m) for metric, m in data["moments"].items()},
+                   {metric: QuantileSketch.from_dict(s) for metric, s in data["sketches"].items()},
+                   data["failed_responses"], data["failed_reports"])
+
+
+class RunSummary:
+    def __init__(self, distances: dict[int, DistanceSummary]):
+        self._distances = distances
+
+    @classmethod
+    def from_stats(cls, stats: UwbStats, relative_accuracy: float = 0.001) -> "RunSummary":
+        distances: dict[int, DistanceSummary] = {}
+        for distance in stats.distances:
+            samples = stats.data[distance].samples
+            values = {"range": samples["RANGE"], "rssi": samples["RSSI"], "rx_pow": stats.power.rx_pow(distance),
+                      "fp": stats.power.fp(distance), "cir": samples["MAX_GROWTH_CIR"]}
+            sketches = {metric: QuantileSketch(relative_accuracy) for metric in SUMMARY_METRICS}
+            for metric, sketch in sketches.items():
+                sketch.add(values[metric])
+            _, failed_responses, _, failed_reports = failed_stages(stats.data[distance].drops)
+            distances[distance] = DistanceSummary({metric: Moments.from_values(values[metric])
+                                                   for metric in SUMMARY_METRICS},
+                                                  sketches, failed_responses, failed_reports)
+        return cls(distances)
+
+    def merge(self, other: "RunSummary") -> "RunSummary":
+        merged = dict(self._distances)
+        for distance, summary in other._distances.items():
+            merged[distance] = merged[distance].merge(summary) if distance in merged else summary
+        return RunSummary(merged)
+
+    @property
+    def stats(self) -> pd.DataFrame:
+        return pd.DataFrame([{"range": distance} | summary.stats()
+                             for distance, summary in sorted(self._distances.items())])
+
+    @property
+    def distances(self) -> dict[int, DistanceSummary]:
+        return self._distances
+
+    def to_dict(self) -> dict:
+        return {str(distance): summary.to_dict() for distance, summary in self._distances.items()}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RunSummary":
+        return cls({int(distance): DistanceSummary.from_dict(summary) for distance, summary in data.items()})